@@ -1,105 +1,99 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import io
+import xlsxwriter
 import database # Import the new db module
 import hmac
 from datetime import datetime
+from functools import lru_cache
 import re
+from backend import processor
+from backend.exporter import workbook_formats, write_formatted_sheet
 
 database.init_db()
 
-def write_formatted_sheet(workbook, worksheet, final_df, detected_date_str, years_text):
-    """
-    Helper function to write a professional analysis report to a specific worksheet.
-    Used for multi-sheet Excel generation.
-    """
-    # formats
-    title_fmt = workbook.add_format({'bold': True, 'font_size': 14, 'align': 'center', 'valign': 'vcenter'})
-    subtitle_fmt = workbook.add_format({'bold': True, 'font_size': 12, 'align': 'center', 'valign': 'vcenter', 'bg_color': '#FFE699', 'border': 1})
-    date_fmt = workbook.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter', 'italic': True, 'border': 1})
-    header_fmt = workbook.add_format({'bold': True, 'bg_color': '#FFD966', 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True})
-    center_fmt = workbook.add_format({'align': 'center', 'valign': 'vcenter', 'border': 1})
-    total_fmt = workbook.add_format({'bold': True, 'bg_color': '#BDD7EE', 'border': 1, 'align': 'center', 'valign': 'vcenter'}) 
-    grand_total_fmt = workbook.add_format({'bold': True, 'bg_color': '#F4B084', 'border': 1, 'align': 'center', 'valign': 'vcenter'}) 
-
-    # Data: Starts R6 (Header in R4/R5)
-    # final_df.to_excel(writer...) is called outside, but we manage the content here
-    
-    subtitle_text = f"{years_text} YEAR SKILL RACK RESULT ANALYSIS"
-    date_text = f"Date: {detected_date_str}"
+# --- TOP-N RANKING ---
+# Solved count (desc), Active utilisation (asc), Total submissions (asc)
+RANK_ASCENDING = [False, True, True]
 
-    # Headers
-    worksheet.merge_range('A1:I1', "OFFICE OF THE CONTROLLER OF EXAMINATIONS", title_fmt)
-    worksheet.merge_range('A2:I2', date_text, date_fmt) 
-    worksheet.merge_range('A3:I3', subtitle_text, subtitle_fmt)
-    
-    worksheet.merge_range('A4:A5', "Branch", header_fmt)
-    worksheet.merge_range('B4:B5', "Year", header_fmt)
-    worksheet.merge_range('C4:E4', "Student Strength Details", header_fmt)
-    worksheet.merge_range('F4:I4', "No of Problems Solved", header_fmt)
-    
-    worksheet.write('C5', "Registered", header_fmt)
-    worksheet.write('D5', "Appeared", header_fmt)
-    worksheet.write('E5', "Absent", header_fmt)
-    worksheet.write('F5', "Zero", header_fmt)
-    worksheet.write('G5', "One", header_fmt)
-    worksheet.write('H5', "Two", header_fmt)
-    worksheet.write('I5', "Three", header_fmt)
-
-    # Apply Row Styles
-    start_row = 5
-    records = final_df.to_dict('records')
-    col_keys = ["Branch", "Year", "No of Registered Students", "No of Students Appeared", "No of Students Absent", "Zero Problems Solved", "One Problem Solved", "Two Problems Solved", "Three Problems Solved"]
-
-    current_branch = None
-    branch_start_idx = -1
-
-    for i, row_data in enumerate(records):
-        row_idx = start_row + i
-        branch_val = row_data['Branch']
-        
-        if "OVERALL TOTAL" in str(branch_val):
-            if current_branch and branch_start_idx != -1:
-                if (row_idx - 1) > branch_start_idx:
-                    worksheet.merge_range(branch_start_idx, 0, row_idx - 1, 0, current_branch, center_fmt)
-                else:
-                    worksheet.write(branch_start_idx, 0, current_branch, center_fmt)
-            fmt = grand_total_fmt
-            worksheet.merge_range(row_idx, 0, row_idx, 1, "OVERALL TOTAL", fmt)
-            for col_num in range(2, 9):
-                key = col_keys[col_num]
-                worksheet.write(row_idx, col_num, row_data[key], fmt)
-                
-        elif "TOTAL" in str(branch_val):
-            fmt = total_fmt
-            worksheet.merge_range(row_idx, 0, row_idx, 1, "TOTAL", fmt)
-            for col_num in range(2, 9):
-                key = col_keys[col_num]
-                worksheet.write(row_idx, col_num, row_data[key], fmt)
-            if current_branch and branch_start_idx != -1:
-                if (row_idx - 1) > branch_start_idx:
-                    worksheet.merge_range(branch_start_idx, 0, row_idx - 1, 0, current_branch, center_fmt)
-                else:
-                    worksheet.write(branch_start_idx, 0, current_branch, center_fmt)
-            current_branch = None
-            branch_start_idx = -1
-        else:
-            fmt = center_fmt
-            for col_num in range(9):
-                key = col_keys[col_num]
-                worksheet.write(row_idx, col_num, row_data[key], fmt)
-            if branch_val != current_branch:
-                if current_branch is not None:
-                    if (row_idx - 1) > branch_start_idx:
-                        worksheet.merge_range(branch_start_idx, 0, row_idx - 1, 0, current_branch, center_fmt)
-                    else:
-                        worksheet.write(branch_start_idx, 0, current_branch, center_fmt)
-                current_branch = branch_val
-                branch_start_idx = row_idx
+def _dense_ranks(values, ascending):
+    """Dense rank of each value in sort order; NaN ranks last, as with na_position='last'."""
+    codes, uniques = pd.factorize(values, sort=True)
+    k = len(uniques)
+    ranks = codes if ascending else k - 1 - codes
+    return np.where(codes < 0, k, ranks).astype('int64'), k + 1
 
-    worksheet.set_column('A:A', 20) 
-    worksheet.set_column('B:B', 15) 
-    worksheet.set_column('C:I', 15)
+def _rank_key(keys, ascending):
+    """
+    One int64 per row ordering rows exactly like a multi-key sort (ties
+    included), or None if the mixed-radix key would overflow.
+    """
+    composite = np.zeros(len(keys[0]), dtype='int64')
+    span = 1
+    for values, asc in zip(keys, ascending):
+        ranks, radix = _dense_ranks(values, asc)
+        span *= radix
+        if span >= 2 ** 62:
+            return None
+        composite = composite * radix + ranks
+    return composite
+
+def _head_count(n, top_n):
+    # Same row count as DataFrame.head(top_n), including negative top_n
+    return max(n + top_n, 0) if top_n < 0 else min(top_n, n)
+
+def rank_top_n(keys, ascending, top_n):
+    """
+    Positions of the rows sort_values(...).head(top_n) would return, in order,
+    without sorting every row: argpartition finds the cut-off key and only the
+    rows up to and tied with it are stably sorted.
+    """
+    n = len(keys[0])
+    take = _head_count(n, top_n)
+    composite = _rank_key(keys, ascending)
+    if composite is None:
+        order = np.lexsort([_dense_ranks(values, asc)[0] for values, asc in zip(reversed(keys), reversed(ascending))])
+        return order[:take]
+    if take == 0:
+        return np.empty(0, dtype='int64')
+    if take < n:
+        cutoff = composite[np.argpartition(composite, take - 1)[take - 1]]
+        candidates = np.flatnonzero(composite <= cutoff)
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(composite[candidates], kind='stable')
+    return candidates[order[:take]]
+
+def rank_top_n_grouped(groups, keys, ascending, top_n):
+    """rank_top_n for every group in one pass: {group: positions}, groups in sorted order."""
+    codes, uniques = pd.factorize(groups, sort=True)
+    composite = _rank_key(keys, ascending)
+    if composite is None:
+        sort_keys = [_dense_ranks(values, asc)[0] for values, asc in zip(reversed(keys), reversed(ascending))]
+    else:
+        sort_keys = [composite]
+    # lexsort is stable, so ties inside a group keep their original order
+    order = np.lexsort(sort_keys + [codes])
+    order = order[codes[order] >= 0]
+    sizes = np.bincount(codes[order], minlength=len(uniques))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return {group: order[starts[g]:starts[g] + _head_count(sizes[g], top_n)] for g, group in enumerate(uniques)}
+
+def ranking_keys(student_df):
+    """Numeric (solved, active seconds, submissions) arrays used to rank students."""
+    solved = pd.to_numeric(student_df['Solved count'], errors='coerce').fillna(0)
+    submissions = pd.to_numeric(student_df['Total submissions'], errors='coerce').fillna(0)
+    active_secs = parse_durations(student_df['Active utilisation'])
+    return [solved.to_numpy(), active_secs.to_numpy(), submissions.to_numpy()]
+
+def ranked_rows(student_df, keys, positions):
+    """The selected rows with the numeric ranking columns attached."""
+    ranked = student_df.iloc[positions].reset_index(drop=True)
+    ranked['Solved count'] = keys[0][positions]
+    ranked['Total submissions'] = keys[2][positions]
+    ranked['Active utilisation_seconds'] = keys[1][positions]
+    return ranked
 
 def get_top_performers_df(student_df, top_n=50):
     """
@@ -108,18 +102,8 @@ def get_top_performers_df(student_df, top_n=50):
     if student_df.empty:
         return pd.DataFrame()
     
-    df = student_df.copy()
-    df['Solved count'] = pd.to_numeric(df['Solved count'], errors='coerce').fillna(0)
-    df['Total submissions'] = pd.to_numeric(df['Total submissions'], errors='coerce').fillna(0)
-    df['Active utilisation_seconds'] = df['Active utilisation'].apply(parse_duration_to_seconds)
-    
-    # Sort: Solved count (desc), Active utilisation (asc), Total submissions (asc)
-    ranked = df.sort_values(
-        by=['Solved count', 'Active utilisation_seconds', 'Total submissions'],
-        ascending=[False, True, True]
-    ).head(top_n).reset_index(drop=True)
-    
-    return ranked
+    keys = ranking_keys(student_df)
+    return ranked_rows(student_df, keys, rank_top_n(keys, RANK_ASCENDING, top_n))
 
 def write_student_rankings(workbook, worksheet, student_df, top_n, start_row_offset):
     """
@@ -130,32 +114,14 @@ def write_student_rankings(workbook, worksheet, student_df, top_n, start_row_off
         return 0
     
     # Formats
-    section_header_fmt = workbook.add_format({
-        'bold': True, 'font_size': 12, 'bg_color': '#4472C4', 
-        'font_color': 'white', 'align': 'center', 'valign': 'vcenter', 'border': 1
-    })
-    perf_header_fmt = workbook.add_format({
-        'bold': True, 'bg_color': '#B4C7E7', 'border': 1, 
-        'align': 'center', 'valign': 'vcenter'
-    })
-    rank_fmt = workbook.add_format({
-        'align': 'center', 'valign': 'vcenter', 'border': 1, 'bold': True
-    })
-    data_fmt = workbook.add_format({
-        'align': 'center', 'valign': 'vcenter', 'border': 1
-    })
-    gold_fmt = workbook.add_format({
-        'align': 'center', 'valign': 'vcenter', 'border': 1, 
-        'bg_color': '#FFD700', 'bold': True
-    })
-    silver_fmt = workbook.add_format({
-        'align': 'center', 'valign': 'vcenter', 'border': 1, 
-        'bg_color': '#C0C0C0', 'bold': True
-    })
-    bronze_fmt = workbook.add_format({
-        'align': 'center', 'valign': 'vcenter', 'border': 1, 
-        'bg_color': '#CD7F32', 'bold': True
-    })
+    fmt = workbook_formats(workbook)
+    section_header_fmt = fmt['section_header']
+    perf_header_fmt = fmt['perf_header']
+    rank_fmt = fmt['rank']
+    data_fmt = fmt['center']
+    gold_fmt = fmt['gold']
+    silver_fmt = fmt['silver']
+    bronze_fmt = fmt['bronze']
     
     def get_rank_fmt(rank):
         if rank == 1: return gold_fmt
@@ -180,7 +146,7 @@ def write_student_rankings(workbook, worksheet, student_df, top_n, start_row_off
     headers = ["Rank", "Reg No", "Name", "Branch", "Year", "Problems Solved", "Submissions", "Active Util"]
     current_row = start_row_offset
     
-    def write_section(ws, section_df, title, start):
+    def write_section(ws, ranked, title, start):
         row = start
         ws.merge_range(row, 0, row, 7, title, section_header_fmt)
         row += 1
@@ -188,20 +154,22 @@ def write_student_rankings(workbook, worksheet, student_df, top_n, start_row_off
             ws.write(row, col, header, perf_header_fmt)
         row += 1
         
-        ranked = get_top_performers_df(section_df, top_n)
-        
         for idx, r in ranked.iterrows():
             write_student_row(ws, row, idx + 1, r)
             row += 1
         return row + 2  # gap
 
+    # Ranking keys are computed once and shared by every section
+    keys = ranking_keys(student_df)
+
     # --- OVERALL ---
-    current_row = write_section(worksheet, student_df, "OVERALL TOP PERFORMERS", current_row)
+    overall = ranked_rows(student_df, keys, rank_top_n(keys, RANK_ASCENDING, top_n))
+    current_row = write_section(worksheet, overall, "OVERALL TOP PERFORMERS", current_row)
     
     # --- BRANCH-WISE ---
-    for branch in sorted(df['Branch'].unique()):
-        branch_df = df[df['Branch'] == branch]
-        current_row = write_section(worksheet, branch_df, f"{branch} - TOP PERFORMERS", current_row)
+    by_branch = rank_top_n_grouped(student_df['Branch'].to_numpy(), keys, RANK_ASCENDING, top_n)
+    for branch, positions in by_branch.items():
+        current_row = write_section(worksheet, ranked_rows(student_df, keys, positions), f"{branch} - TOP PERFORMERS", current_row)
     
     # Set column widths
     worksheet.set_column('A:A', 8)
@@ -279,6 +247,13 @@ year_map = {
     'CITAR-III': 'CITAR-III'
 }
 
+_ROMAN_II = re.compile(r'\bII\b')
+_ROMAN_III = re.compile(r'\bIII\b')
+_ROMAN_I = re.compile(r'\bI\b')
+_ROMAN_IV = re.compile(r'\bIV\b')
+_DIGITS = re.compile(r'\d+')
+_FLOAT_SUFFIX = re.compile(r'\.0$')
+
 def normalize_year_val(val):
     val = str(val).upper().strip()
     # Broad catch for any CITAR related year labeling
@@ -291,11 +266,11 @@ def normalize_year_val(val):
     if '2027' in val: return 'III'  # Regular III year
     if 'CITAR' in val: return 'CITAR-III'
     
-    if re.search(r'\bII\b', val): return 'II'
-    if re.search(r'\bIII\b', val): return 'III'
-    if re.search(r'\bI\b', val): return 'I'
-    if re.search(r'\bIV\b', val): return 'IV'
-    digits = re.findall(r'\d+', val)
+    if _ROMAN_II.search(val): return 'II'
+    if _ROMAN_III.search(val): return 'III'
+    if _ROMAN_I.search(val): return 'I'
+    if _ROMAN_IV.search(val): return 'IV'
+    digits = _DIGITS.findall(val)
     if digits:
         for d in digits:
             if d == '1': return 'I'
@@ -304,46 +279,35 @@ def normalize_year_val(val):
             if d == '4': return 'IV'
     return val
 
-# --- STATIC DATA (HARDCODED) ---
-STATIC_STRENGTH = [
-    # Second Year (II)
-    {"Branch": "CIVIL", "Year": "II", "Registered_Count": 29},
-    {"Branch": "CSE", "Year": "II", "Registered_Count": 1091},
-    {"Branch": "EEE", "Year": "II", "Registered_Count": 65},
-    {"Branch": "ECE", "Year": "II", "Registered_Count": 267},
-    {"Branch": "MECH", "Year": "II", "Registered_Count": 128},
-    {"Branch": "MCT", "Year": "II", "Registered_Count": 61},
-    {"Branch": "BIOMED", "Year": "II", "Registered_Count": 62},
-    {"Branch": "IT", "Year": "II", "Registered_Count": 193},
-    {"Branch": "AIDS", "Year": "II", "Registered_Count": 335},
-    {"Branch": "CSBS", "Year": "II", "Registered_Count": 67},
-    {"Branch": "AIML", "Year": "II", "Registered_Count": 130},
-    {"Branch": "CS", "Year": "II", "Registered_Count": 72},
-    {"Branch": "ACT", "Year": "II", "Registered_Count": 63},
-    {"Branch": "VLSI", "Year": "II", "Registered_Count": 64},
-    
-    # Third Year (III)
-    {"Branch": "CIVIL", "Year": "III", "Registered_Count": 32},
-    {"Branch": "CSE", "Year": "III", "Registered_Count": 258},
-    {"Branch": "EEE", "Year": "III", "Registered_Count": 63},
-    {"Branch": "ECE", "Year": "III", "Registered_Count": 193},
-    {"Branch": "MECH", "Year": "III", "Registered_Count": 126},
-    {"Branch": "MCT", "Year": "III", "Registered_Count": 61},
-    {"Branch": "BIOMED", "Year": "III", "Registered_Count": 63},
-    {"Branch": "IT", "Year": "III", "Registered_Count": 193},
-    {"Branch": "AIDS", "Year": "III", "Registered_Count": 163},
-    {"Branch": "CSBS", "Year": "III", "Registered_Count": 63},
-    {"Branch": "AIML", "Year": "III", "Registered_Count": 128},
-    {"Branch": "CS", "Year": "III", "Registered_Count": 63},
-    {"Branch": "ACT", "Year": "III", "Registered_Count": 60},
-    {"Branch": "VLSI", "Year": "III", "Registered_Count": 65},
-    
-    # CITAR (Third Year Only)
-    {"Branch": "CSE", "Year": "CITAR-III", "Registered_Count": 189},
-    {"Branch": "AIDS", "Year": "CITAR-III", "Registered_Count": 63},
-    {"Branch": "EEE", "Year": "CITAR-III", "Registered_Count": 59},
-    {"Branch": "ECE", "Year": "CITAR-III", "Registered_Count": 64}
-]
+# Raw -> canonical tables, kept across Streamlit reruns
+NORMALIZE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def _canonical_branch(raw):
+    return normalize_branch(raw)
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def _canonical_year(raw):
+    # Same as .astype(str).replace(r'\.0$', '', regex=True) before normalizing
+    return normalize_year_val(_FLOAT_SUFFIX.sub('', str(raw)))
+
+def _normalize_categories(col, lookup):
+    """Normalize only the distinct values of `col`; returns a categorical column."""
+    cat = col.astype('category')
+    canon = [lookup(v) for v in cat.cat.categories]
+    codes = cat.cat.codes.to_numpy()
+    if (codes == -1).any():
+        canon.append(lookup(np.nan))
+        codes = np.where(codes == -1, len(canon) - 1, codes)
+    canon_codes, canon_values = pd.factorize(pd.Index(canon, dtype=object))
+    normalized = pd.Categorical.from_codes(canon_codes[codes], canon_values)
+    return pd.Series(normalized, index=col.index, name=col.name)
+
+def normalize_branch_column(col):
+    return _normalize_categories(col, _canonical_branch)
+
+def normalize_year_column(col):
+    return _normalize_categories(col, _canonical_year)
 
 # Column Mapping Definition
 RES_COL_MAP = {
@@ -361,10 +325,13 @@ RES_COL_MAP = {
     ]
 }
 
+DURATION_SENTINEL = 99999999 # Treat NaNs as very large time (bottom of list)
+_DURATION_MAX_LEN = 12
+
 def parse_duration_to_seconds(val):
     """Utility to convert HH:MM:SS or HH:MM duration strings to seconds."""
     if pd.isna(val) or str(val).lower() in ['nan', 'n/a', '', 'none']:
-        return 99999999 # Treat NaNs as very large time (bottom of list)
+        return DURATION_SENTINEL
     val = str(val).strip()
     try:
         # Handle HH:MM:SS
@@ -374,47 +341,100 @@ def parse_duration_to_seconds(val):
         elif len(parts) == 2:
             return parts[0] * 60 + parts[1]
         else:
-            return 99999999
-    except:
-         return 99999999
+            return DURATION_SENTINEL
+    except ValueError:
+         return DURATION_SENTINEL
+
+def parse_durations(col):
+    """
+    Column-level parse_duration_to_seconds. Plain HH:MM:SS / MM:SS values are
+    decoded straight from their code points with NumPy; anything unusual
+    (blanks, signs, 'N/A', garbage) falls back to the scalar parser.
+    """
+    text = col.astype(str)
+    values = text.to_numpy(dtype=object)
+    lengths = text.str.len().fillna(0).to_numpy(dtype='int64')
+    result = np.full(len(values), DURATION_SENTINEL, dtype='int64')
+    ok = np.zeros(len(values), dtype=bool)
+
+    short = np.flatnonzero((lengths >= 3) & (lengths <= _DURATION_MAX_LEN))
+    if len(short):
+        n_chars = lengths[short]
+        width = int(n_chars.max())
+        chars = values[short].astype(f'U{width}')
+        # One row per character position so each step below is a contiguous scan
+        codes = np.ascontiguousarray(chars.view(np.uint32).reshape(len(chars), width).T).astype('int64')
+        is_digit = (codes >= 48) & (codes <= 57)
+        is_colon = codes == 58
+        colons = is_colon.sum(axis=0)
+        last = codes[n_chars - 1, np.arange(len(chars))]
+        valid = (
+            (is_digit | is_colon | (codes == 0)).all(axis=0)
+            & ((colons == 1) | (colons == 2))
+            & ~is_colon[0] & (last != 58)
+            & ~(is_colon[1:] & is_colon[:-1]).any(axis=0)
+        )
+        digits = np.where(is_digit, codes - 48, 0)
+        acc = np.zeros(len(chars), dtype='int64')
+        total = np.zeros(len(chars), dtype='int64')
+        for j in range(width):
+            acc = np.where(is_digit[j], acc * 10 + digits[j], acc)
+            total = np.where(is_colon[j], total * 60 + acc, total)
+            acc = np.where(is_colon[j], 0, acc)
+        result[short[valid]] = (total * 60 + acc)[valid]
+        ok[short[valid]] = True
+
+    rest = np.flatnonzero(~ok)
+    if len(rest):
+        leftovers = col.iloc[rest]
+        codes, uniques = pd.factorize(leftovers, use_na_sentinel=False)
+        parsed = np.array([parse_duration_to_seconds(v) for v in uniques], dtype='int64')
+        result[rest] = parsed[codes]
+    return pd.Series(result, index=col.index, name=col.name)
+
+# Lower-case alias -> standard name, precompiled from RES_COL_MAP (earlier entries win)
+RES_ALIAS_LOOKUP = {}
+for _standard, _variations in RES_COL_MAP.items():
+    for _alias in _variations + [_standard.lower()]:
+        RES_ALIAS_LOOKUP.setdefault(_alias, _standard)
+
+HEADER_CACHE_SIZE = 256
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def resolve_headers(headers):
+    """Stripped names plus candidate positions per standard name, cached per header layout."""
+    names = tuple(str(h).strip() for h in headers)
+    candidates = {}
+    for pos, name in enumerate(names):
+        standard = RES_ALIAS_LOOKUP.get(name.lower())
+        if standard is not None:
+            candidates.setdefault(standard, []).append(pos)
+    # Fallback for Reg No specifically if missed - GREEDY SEARCH
+    if 'Reg No' not in candidates:
+        claimed = {pos for positions in candidates.values() for pos in positions}
+        for pos, name in enumerate(names):
+            if pos not in claimed and 'reg' in name.lower() and 'no' in name.lower():
+                candidates['Reg No'] = [pos]
+                break
+    return names, tuple((standard, tuple(positions)) for standard, positions in candidates.items())
 
 def standardize_columns(df):
     """Standardize column names for a single dataframe, handling collisions."""
-    df.columns = df.columns.str.strip()
-    
-    # Apply mapping
-    for standard, variations in RES_COL_MAP.items():
-        # Find all columns that match this standard key (including itself)
-        candidates = []
-        for col in df.columns:
-            if col.lower() in variations or col.lower() == standard.lower():
-                candidates.append(col)
-        
-        if not candidates:
-            continue
-            
+    names, candidates = resolve_headers(tuple(df.columns))
+    targets = dict(enumerate(names))
+    for standard, positions in candidates:
         # If multiple candidates exist (e.g. 'Reg No' is empty, 'Regn No' is full), pick the best one
-        best_col = candidates[0]
-        if len(candidates) > 1:
-            # Pick the one with the most non-null values
-            best_col = max(candidates, key=lambda c: df[c].count())
-        
-        # Rename the best candidate to standard
-        if best_col != standard:
-             df.rename(columns={best_col: standard}, inplace=True)
-        
-        # Drop other candidates to avoid confusion (if they still exist after rename)
-        other_candidates = [c for c in candidates if c != best_col and c in df.columns]
-        if other_candidates:
-            df.drop(columns=other_candidates, inplace=True)
-
-    # Fallback for Reg No specifically if missed - GREEDY SEARCH
-    if 'Reg No' not in df.columns:
-        col_map = {c.lower().strip(): c for c in df.columns}
-        for norm_col, orig_col in col_map.items():
-            if 'reg' in norm_col and 'no' in norm_col:
-                df.rename(columns={orig_col: 'Reg No'}, inplace=True)
-                break
+        best = positions[0]
+        if len(positions) > 1:
+            best = max(positions, key=lambda pos: df.iloc[:, pos].count())
+        for pos in positions:
+            del targets[pos]
+        targets[best] = standard
+    # One positional select + relabel: the other candidates are dropped and the
+    # renamed column can never collide with another of the same name
+    positions = sorted(targets)
+    df = df.iloc[:, positions]
+    df.columns = [targets[pos] for pos in positions]
     return df
 
 st.set_page_config(page_title="Result Analysis Tool", layout="wide")
@@ -469,8 +489,8 @@ with tab1:
 
     if uploaded_files:
         try:
-            # --- USE STATIC DATA FOR REGISTERED COUNTS ---
-            registered_counts = pd.DataFrame(STATIC_STRENGTH)
+            # --- REGISTERED COUNTS: the backend's live strength index ---
+            registered_counts = processor.STRENGTH_INDEX
 
             # --- LOAD RESULT FILES (APPEARED) ---
             all_dfs = []
@@ -550,13 +570,12 @@ with tab1:
                 # 1. Collect from Current Uploads
                 for d_str in unique_dates:
                     df_date = df_res[df_res['Derived_Date'] == d_str].copy()
-                    df_date['Branch'] = df_date['Branch'].apply(normalize_branch)
-                    df_date['Year'] = df_date['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
+                    df_date['Branch'] = normalize_branch_column(df_date['Branch'])
+                    df_date['Year'] = normalize_year_column(df_date['Year'])
                     df_date['Solved count'] = pd.to_numeric(df_date['Solved count'], errors='coerce').fillna(0).astype(int)
                     
-                    for (branch, year), group in df_date.groupby(['Branch', 'Year']):
-                        reg = registered_counts[(registered_counts['Branch'] == branch) & (registered_counts['Year'] == year)]
-                        reg_val = int(reg.iloc[0]['Registered_Count']) if not reg.empty else 0
+                    for (branch, year), group in df_date.groupby(['Branch', 'Year'], observed=True):
+                        reg_val = int(registered_counts.get((branch, year), 0))
                         current_raw_data.append({
                             'date': d_str, 'Branch': branch, 'Year': year, 
                             'Registered': reg_val, 'Appeared': len(group),
@@ -620,6 +639,7 @@ with tab1:
 
                 # Process current upload dates
                 c_df_temp = pd.DataFrame(current_raw_data)
+                pending_saves = []
                 for d_str in unique_dates:
                     d_rows = [r for r in current_raw_data if r['date'] == d_str]
                     res_df = generate_report_df(d_str, d_rows)
@@ -628,8 +648,8 @@ with tab1:
                     
                     # Extract student-level data for this date
                     student_data = df_res[df_res['Derived_Date'] == d_str].copy()
-                    student_data['Branch'] = student_data['Branch'].apply(normalize_branch)
-                    student_data['Year'] = student_data['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
+                    student_data['Branch'] = normalize_branch_column(student_data['Branch'])
+                    student_data['Year'] = normalize_year_column(student_data['Year'])
                     student_data['Solved count'] = pd.to_numeric(student_data['Solved count'], errors='coerce').fillna(0).astype(int)
                     student_data['Total submissions'] = pd.to_numeric(student_data['Total submissions'], errors='coerce').fillna(0).astype(int)
                     if 'Active utilisation' not in student_data.columns:
@@ -640,11 +660,16 @@ with tab1:
                     report_obj = {"date": d_str, "df": res_df, "years_text": ", ".join(u_yrs), "is_current": True, "student_data": student_data}
                     all_final_reports.append(report_obj)
                     
-                    # Save to DB (Strictly new data for this session)
+                    # Queue for DB (Strictly new data for this session)
                     unique_id = f"Upload_{d_str}_{len(uploaded_files)}"
                     if 'last_saved' not in st.session_state: st.session_state.last_saved = set()
                     if unique_id not in st.session_state.last_saved:
-                        database.save_report("Manual Upload", "User File", d_str, res_df)
+                        pending_saves.append((unique_id, ("Manual Upload", "User File", d_str, res_df)))
+
+                # Save every new date of this upload in one transaction
+                if pending_saves:
+                    database.save_reports([report for _, report in pending_saves])
+                    for unique_id, (_, _, d_str, _) in pending_saves:
                         st.session_state.last_saved.add(unique_id)
                         st.toast(f"Report for {d_str} saved!", icon="💾")
 
@@ -673,13 +698,12 @@ with tab1:
                 all_final_reports.sort(key=sort_rep)
 
                 output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    workbook = writer.book
-                    for rep in all_final_reports:
-                        pfx = "Past_" if not rep['is_current'] else ""
-                        sheet_name = f"{pfx}{rep['date']}"[:31]
-                        rep['df'].to_excel(writer, index=False, sheet_name=sheet_name, startrow=5, header=False)
-                        write_formatted_sheet(workbook, writer.sheets[sheet_name], rep['df'], rep['date'], rep['years_text'])
+                workbook = xlsxwriter.Workbook(output)
+                for rep in all_final_reports:
+                    pfx = "Past_" if not rep['is_current'] else ""
+                    sheet_name = f"{pfx}{rep['date']}"[:31]
+                    write_formatted_sheet(workbook, workbook.add_worksheet(sheet_name), rep['df'].to_dict('records'), rep['date'], rep['years_text'])
+                workbook.close()
 
                 # Filename from Current
                 curr_ds = sorted(list(set([r['date'] for r in all_final_reports if r['is_current']])))
@@ -829,8 +853,8 @@ with tab1:
                     
                     # --- AGGREGATION LOGIC ---
                     df_agg = df_res.copy()
-                    df_agg['Branch'] = df_agg['Branch'].apply(normalize_branch)
-                    df_agg['Year'] = df_agg['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
+                    df_agg['Branch'] = normalize_branch_column(df_agg['Branch'])
+                    df_agg['Year'] = normalize_year_column(df_agg['Year'])
                     df_agg['Solved count'] = pd.to_numeric(df_agg['Solved count'], errors='coerce').fillna(0).astype(int)
                     
                     if 'Timestamp' in df_agg.columns:
@@ -843,8 +867,8 @@ with tab1:
                     if 'Active utilisation' not in df_agg.columns:
                         df_agg['Active utilisation'] = '00:00:00'
                     
-                    df_agg['Active utilisation_seconds'] = df_agg['Active utilisation'].apply(parse_duration_to_seconds)
-                    df_agg['Active_Secs_Agg'] = df_agg['Active utilisation_seconds'].replace(99999999, 0)
+                    df_agg['Active utilisation_seconds'] = parse_durations(df_agg['Active utilisation'])
+                    df_agg['Active_Secs_Agg'] = df_agg['Active utilisation_seconds'].replace(DURATION_SENTINEL, 0)
                     
                     has_reg = 'Reg No' in df_agg.columns
                     id_col = 'Reg No' if has_reg else 'Name'
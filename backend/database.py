@@ -1,14 +1,101 @@
 import sqlite3
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+import threading
+from contextlib import contextmanager
 
 # --- DATABASE CONFIG ---
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "history.db")
 
+# Rolling leaderboards kept materialized in window_totals: name -> days back
+# from the latest ingested day, None for semester-to-date
+ROLLING_WINDOWS = {"7d": 7, "30d": 30, "semester": None}
+# First day of the current semester (YYYY-MM-DD); defaults to Jan 1 / Jul 1
+def _semester_start(value):
+    if not value: return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"SKILLRACK_SEMESTER_START must be a YYYY-MM-DD date, got {value!r}") from None
+
+SEMESTER_START = _semester_start(os.environ.get("SKILLRACK_SEMESTER_START"))
+
+# Connections to DB_PATH come from a small pool: at most POOL_SIZE are open
+# however many threads serve requests, and a caller past that waits for one
+# to be returned. WAL lets readers run while a write is in progress; writers
+# wait up to BUSY_TIMEOUT_MS for the lock
+POOL_SIZE = int(os.environ.get("SKILLRACK_DB_POOL_SIZE", 4))
+BUSY_TIMEOUT_MS = int(os.environ.get("SKILLRACK_DB_BUSY_TIMEOUT_MS", 5000))
+CACHE_SIZE_KIB = int(os.environ.get("SKILLRACK_DB_CACHE_KIB", 4 * 1024))
+MMAP_SIZE_BYTES = int(os.environ.get("SKILLRACK_DB_MMAP_BYTES", 32 * 1024 * 1024))
+
+_SLOTS = threading.BoundedSemaphore(POOL_SIZE)
+# (path, connection) pairs not in use, most recently returned last
+_IDLE = []
+_IDLE_LOCK = threading.Lock()
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable under WAL except for the last commits on power loss
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+@contextmanager
+def connection():
+    """A tuned connection to DB_PATH, borrowed from the pool for the block."""
+    path = DB_PATH
+    with _SLOTS:
+        # Connections to a previous DB_PATH are closed rather than reused
+        with _IDLE_LOCK:
+            stale = [conn for p, conn in _IDLE if p != path]
+            _IDLE[:] = [(p, conn) for p, conn in _IDLE if p == path]
+            conn = _IDLE.pop()[1] if _IDLE else None
+        for old in stale:
+            old.close()
+        if conn is None:
+            conn = _open(path)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with _IDLE_LOCK:
+                _IDLE.append((path, conn))
+
+@contextmanager
+def transaction():
+    """
+    A pooled connection inside BEGIN IMMEDIATE ... COMMIT, rolled back on
+    error. Taking the write lock up front means a busy writer waits out the
+    busy timeout instead of failing with "database is locked" halfway through.
+    """
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def close_all():
+    """Close the idle pooled connections (on shutdown); the pool reopens them on next use."""
+    with _IDLE_LOCK:
+        conns = [conn for _, conn in _IDLE]
+        _IDLE.clear()
+    for conn in conns:
+        conn.close()
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    with transaction() as conn:
+        _create_schema(conn.cursor())
+
+def _create_schema(c):
     c.execute('''CREATE TABLE IF NOT EXISTS reports (
         id INTEGER PRIMARY KEY AUTOINCREMENT, 
         timestamp TEXT, 
@@ -38,41 +125,114 @@ def init_db():
         three_solved INTEGER,
         FOREIGN KEY(report_id) REFERENCES reports(id)
     )''')
-    conn.commit()
-    conn.close()
 
-def save_report(ref_filename, res_filename, analysis_date, final_df):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # Per-student, per-day maxima from every ingested upload, plus running
+    # Monday-to-Sunday totals kept up to date for the students each upload touches
+    c.execute('''CREATE TABLE IF NOT EXISTS student_days (
+        reg_no TEXT NOT NULL,
+        day TEXT NOT NULL,
+        solved INTEGER,
+        submissions INTEGER,
+        active_secs INTEGER,
+        branch TEXT,
+        year TEXT,
+        name TEXT,
+        PRIMARY KEY (reg_no, day)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS student_weeks (
+        reg_no TEXT NOT NULL,
+        week_start TEXT NOT NULL,
+        days INTEGER,
+        solved INTEGER,
+        submissions INTEGER,
+        active_secs INTEGER,
+        first_day TEXT,
+        branch TEXT,
+        year TEXT,
+        name TEXT,
+        PRIMARY KEY (reg_no, week_start)
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_student_days_day ON student_days (day)")
+
+    c.execute('''CREATE TABLE IF NOT EXISTS window_totals (
+        window_name TEXT NOT NULL,
+        reg_no TEXT NOT NULL,
+        days INTEGER,
+        solved INTEGER,
+        submissions INTEGER,
+        active_secs INTEGER,
+        first_day TEXT,
+        branch TEXT,
+        year TEXT,
+        name TEXT,
+        PRIMARY KEY (window_name, reg_no)
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_window_totals_branch_year ON window_totals (window_name, branch, year)")
+    c.execute('''CREATE TABLE IF NOT EXISTS window_meta (
+        window_name TEXT PRIMARY KEY,
+        start_day TEXT,
+        end_day TEXT
+    )''')
+    # Window bounds depend on config (semester start); rebuild only the stale ones
+    refresh_windows(c)
+
+REPORT_DATA_SOURCE = ['Branch', 'Year', 'No of Registered Students', 'No of Students Appeared', 'No of Students Absent',
+                      'Zero Problems Solved', 'One Problem Solved', 'Two Problems Solved', 'Three Problems Solved']
+
+def report_data_values(final_df):
+    """report_data values (without report_id), built column by column rather than row by row."""
+    columns = [final_df['Branch'].tolist(), final_df['Year'].tolist()]
+    columns += [final_df[col].astype('int64').tolist() for col in REPORT_DATA_SOURCE[2:]]
+    return list(zip(*columns))
+
+def report_total_students(final_df):
     total_row = final_df[final_df['Branch'] == 'OVERALL TOTAL']
-    total_students = int(total_row.iloc[0]['No of Registered Students']) if not total_row.empty else 0
+    return int(total_row.iloc[0]['No of Registered Students']) if not total_row.empty else 0
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT INTO reports (timestamp, ref_filename, res_filename, analysis_date, total_students) VALUES (?, ?, ?, ?, ?)", 
-              (timestamp, ref_filename, res_filename, analysis_date, total_students))
-    report_id = c.lastrowid
-    
-    for _, row in final_df.iterrows():
-        c.execute("""INSERT INTO report_data (report_id, branch, year, registered, appeared, absent, zero_solved, one_solved, two_solved, three_solved) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                 (report_id, row['Branch'], row['Year'], int(row['No of Registered Students']), 
-                  int(row['No of Students Appeared']), int(row['No of Students Absent']), 
-                  int(row['Zero Problems Solved']), int(row['One Problem Solved']), 
-                  int(row['Two Problems Solved']), int(row['Three Problems Solved'])))
-    conn.commit()
-    conn.close()
-    return report_id
+def save_reports(reports):
+    """
+    Persist [(ref_filename, res_filename, analysis_date, final_df), ...] in one
+    transaction: either every report of an upload is saved or none is.
+    Returns the new report ids in order.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # Parameters are prepared before the write lock is taken
+    prepared = [((timestamp, ref_filename, res_filename, analysis_date, report_total_students(final_df)), report_data_values(final_df))
+                for ref_filename, res_filename, analysis_date, final_df in reports]
+    report_ids = []
+    with transaction() as conn:
+        c = conn.cursor()
+        for meta, values in prepared:
+            c.execute("INSERT INTO reports (timestamp, ref_filename, res_filename, analysis_date, total_students) VALUES (?, ?, ?, ?, ?)", meta)
+            report_id = c.lastrowid
+            c.executemany("""INSERT INTO report_data (report_id, branch, year, registered, appeared, absent, zero_solved, one_solved, two_solved, three_solved) 
+                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                          ((report_id, *row) for row in values))
+            report_ids.append(report_id)
+    return report_ids
+
+def save_report(ref_filename, res_filename, analysis_date, final_df):
+    return save_reports([(ref_filename, res_filename, analysis_date, final_df)])[0]
 
 def get_all_reports():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM reports ORDER BY id DESC", conn)
-    conn.close()
+    with connection() as conn:
+        df = pd.read_sql_query("SELECT * FROM reports ORDER BY id DESC", conn)
     return df.to_dict('records')
 
+def get_reports_version():
+    """(newest report id, report count); changes whenever a report is saved."""
+    with connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM reports").fetchone()
+
+def get_report_stamp(report_id):
+    """Save timestamp of a report, or None if it does not exist."""
+    with connection() as conn:
+        row = conn.execute("SELECT timestamp FROM reports WHERE id = ?", (report_id,)).fetchone()
+    return None if row is None else (row[0] or "")
+
 def get_report_data(report_id):
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM report_data WHERE report_id = ?", conn, params=(report_id,))
-    conn.close()
+    with connection() as conn:
+        df = pd.read_sql_query("SELECT * FROM report_data WHERE report_id = ?", conn, params=(report_id,))
     
     if df.empty: return []
     
@@ -84,3 +244,131 @@ def get_report_data(report_id):
         'two_solved': 'Two Problems Solved', 'three_solved': 'Three Problems Solved'
     }
     return df.rename(columns=rename_map).to_dict('records')
+
+STUDENT_DAY_COLUMNS = ['reg_no', 'day', 'solved', 'submissions', 'active_secs', 'branch', 'year', 'name']
+
+def upsert_student_days(days_df):
+    """
+    Merge student-day rows (STUDENT_DAY_COLUMNS, ISO dates) into the fact
+    table, keeping the per-day maxima, then rebuild the weekly totals of only
+    the (student, week) pairs this batch touched.
+    """
+    if days_df.empty: return 0
+    rows = days_df[STUDENT_DAY_COLUMNS].astype(object).where(days_df[STUDENT_DAY_COLUMNS].notna(), None)
+    touched = days_df[['reg_no', 'day']].copy()
+    day = pd.to_datetime(touched['day'])
+    touched['week_start'] = (day - pd.to_timedelta(day.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+    touched = touched[['reg_no', 'week_start']].drop_duplicates()
+
+    with transaction() as conn:
+        _merge_student_days(conn.cursor(), rows, touched)
+    return len(rows)
+
+def _merge_student_days(c, rows, touched):
+    c.executemany("""INSERT INTO student_days (reg_no, day, solved, submissions, active_secs, branch, year, name)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                     ON CONFLICT(reg_no, day) DO UPDATE SET
+                         solved = MAX(COALESCE(solved, 0), COALESCE(excluded.solved, 0)),
+                         submissions = MAX(COALESCE(submissions, 0), COALESCE(excluded.submissions, 0)),
+                         active_secs = MAX(COALESCE(active_secs, 0), COALESCE(excluded.active_secs, 0)),
+                         branch = COALESCE(branch, excluded.branch),
+                         year = COALESCE(year, excluded.year),
+                         name = COALESCE(name, excluded.name)""",
+                  rows.itertuples(index=False, name=None))
+
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS touched_weeks (reg_no TEXT, week_start TEXT)")
+    c.execute("DELETE FROM touched_weeks")
+    c.executemany("INSERT INTO touched_weeks VALUES (?, ?)", touched.itertuples(index=False, name=None))
+    # Branch/Year/Name come from each week's first day (SQLite takes bare
+    # columns from the row that produced MIN(day))
+    c.execute("""INSERT OR REPLACE INTO student_weeks
+                     (reg_no, week_start, days, solved, submissions, active_secs, first_day, branch, year, name)
+                 SELECT d.reg_no, t.week_start, COUNT(*), SUM(d.solved), SUM(d.submissions), SUM(d.active_secs),
+                        MIN(d.day), d.branch, d.year, d.name
+                 FROM touched_weeks t
+                 JOIN student_days d ON d.reg_no = t.reg_no AND d.day BETWEEN t.week_start AND date(t.week_start, '+6 days')
+                 GROUP BY d.reg_no, t.week_start""")
+    refresh_windows(c, touched=True)
+
+def window_range(window_name, anchor):
+    """Inclusive (start, end) ISO days of a rolling window ending on `anchor`."""
+    end = datetime.strptime(anchor, "%Y-%m-%d")
+    days = ROLLING_WINDOWS[window_name]
+    if days is not None:
+        return (end - timedelta(days=days - 1)).strftime("%Y-%m-%d"), anchor
+    if SEMESTER_START:
+        return SEMESTER_START, anchor
+    return f"{end.year}-{'01' if end.month < 7 else '07'}-01", anchor
+
+def refresh_windows(c, touched=False):
+    """
+    Bring window_totals up to date after student_days changed (touched) or
+    on startup. A window whose start did not move can only have changed for
+    the students in touched_weeks (any day past its old end was just
+    inserted), so only those are recomputed; a window that slid is rebuilt.
+    On startup, a window whose stored bounds still match is left alone.
+    """
+    anchor = c.execute("SELECT MAX(day) FROM student_days").fetchone()[0]
+    if anchor is None: return
+    for window_name in ROLLING_WINDOWS:
+        start, end = window_range(window_name, anchor)
+        previous = c.execute("SELECT start_day, end_day FROM window_meta WHERE window_name = ?", (window_name,)).fetchone()
+        if not touched and previous == (start, end):
+            continue
+        if touched and previous is not None and previous[0] == start:
+            only = "AND reg_no IN (SELECT reg_no FROM touched_weeks)"
+        else:
+            only = ""
+        c.execute(f"DELETE FROM window_totals WHERE window_name = ? {only}", (window_name,))
+        c.execute(f"""INSERT INTO window_totals
+                          (window_name, reg_no, days, solved, submissions, active_secs, first_day, branch, year, name)
+                      SELECT ?, reg_no, COUNT(*), SUM(solved), SUM(submissions), SUM(active_secs),
+                             MIN(day), branch, year, name
+                      FROM student_days WHERE day BETWEEN ? AND ? {only}
+                      GROUP BY reg_no""", (window_name, start, end))
+        c.execute("INSERT OR REPLACE INTO window_meta VALUES (?, ?, ?)", (window_name, start, end))
+
+def get_window_leaderboard(window_name, branch=None, year=None):
+    """
+    Materialized totals of one rolling window, optionally filtered by branch
+    and/or year. Returns (start, end, totals) with totals laid out like
+    get_student_leaderboard.
+    """
+    query = """SELECT reg_no, days, solved, submissions, active_secs, branch, year, name
+               FROM window_totals WHERE window_name = ?"""
+    params = [window_name]
+    if branch is not None:
+        query += " AND branch = ?"
+        params.append(branch)
+    if year is not None:
+        query += " AND year = ?"
+        params.append(year)
+    with connection() as conn:
+        bounds = conn.execute("SELECT start_day, end_day FROM window_meta WHERE window_name = ?", (window_name,)).fetchone()
+        df = pd.read_sql_query(query + " ORDER BY reg_no", conn, params=params)
+    start, end = bounds if bounds else (None, None)
+    return start, end, df
+
+def get_student_leaderboard(start=None, end=None):
+    """
+    Weekly-report style totals per student for days in [start, end] (ISO,
+    either side open). Whole Monday-Sunday windows are summed from the
+    running weekly totals; anything else from the student-day rows.
+    """
+    whole_weeks = (start is not None and end is not None
+                   and datetime.strptime(start, "%Y-%m-%d").weekday() == 0
+                   and datetime.strptime(end, "%Y-%m-%d").weekday() == 6)
+    if whole_weeks:
+        query = """SELECT reg_no, SUM(days) AS days, SUM(solved) AS solved, SUM(submissions) AS submissions,
+                          SUM(active_secs) AS active_secs, MIN(first_day) AS first_day, branch, year, name
+                   FROM student_weeks WHERE week_start BETWEEN ? AND ?
+                   GROUP BY reg_no ORDER BY reg_no"""
+    else:
+        query = """SELECT reg_no, COUNT(*) AS days, SUM(solved) AS solved, SUM(submissions) AS submissions,
+                          SUM(active_secs) AS active_secs, MIN(day) AS first_day, branch, year, name
+                   FROM student_days WHERE day BETWEEN ? AND ?
+                   GROUP BY reg_no ORDER BY reg_no"""
+    with connection() as conn:
+        df = pd.read_sql_query(query, conn, params=(start or "0000-01-01", end or "9999-12-31"))
+    # first_day only picks the row branch/year/name come from
+    return df.drop(columns=['first_day'])
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import exporter
+
+# --- EXPORT CACHE CONFIG ---
+# Rendered workbooks, keyed by the SHA-256 of the exporter, its arguments and
+# exporter.EXPORTER_VERSION; least recently used files go first past MAX_CACHE_BYTES
+EXPORT_CACHE_DIR = os.environ.get("SKILLRACK_EXPORT_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "export_cache"))
+MAX_CACHE_BYTES = int(os.environ.get("SKILLRACK_EXPORT_CACHE_BYTES", 256 * 1024 * 1024))
+
+_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def export_key(render_fn, *args):
+    """Content hash of an export; the payload is encoded piece by piece, never as one string."""
+    digest = hashlib.sha256(f"{render_fn.__name__}:{exporter.EXPORTER_VERSION}:".encode())
+    for piece in json.JSONEncoder(sort_keys=True, default=exporter.json_default).iterencode(args):
+        digest.update(piece.encode())
+    return digest.hexdigest()
+
+def _path(key):
+    if not _KEY_RE.match(key or ""):
+        raise ValueError(f"Invalid export key: {key}")
+    return os.path.join(EXPORT_CACHE_DIR, f"{key}.export")
+
+def open_cached(key):
+    """Open the cached export for `key` for reading, or return None on a miss."""
+    path = _path(key)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    # Touch so eviction sees this entry as recently used
+    os.utime(path)
+    return f
+
+def render(key, render_fn, *args):
+    """
+    Render render_fn(*args, output=f) into the cache under `key` and return
+    the result opened for reading. The handle stays valid even if eviction
+    removes the file right away.
+    """
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    path = _path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as out:
+            render_fn(*args, output=out)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    f = open(path, 'rb')
+    evict()
+    return f
+
+def evict(max_bytes=None):
+    """Drop least recently used exports until the cache fits in max_bytes."""
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(EXPORT_CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(EXPORT_CACHE_DIR):
+        if not name.endswith(".export"): continue
+        path = os.path.join(EXPORT_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes: break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
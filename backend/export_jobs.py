@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# --- EXPORT JOB CONFIG ---
+# Exports too big to render inside a request run as jobs on this many worker
+# threads; finished files are kept for EXPORT_JOB_TTL seconds after they finish
+EXPORT_JOB_WORKERS = int(os.environ.get("SKILLRACK_EXPORT_JOB_WORKERS", 2))
+EXPORT_JOB_DIR = os.environ.get("SKILLRACK_EXPORT_JOB_DIR", os.path.join(os.path.dirname(__file__), "..", "export_jobs"))
+EXPORT_JOB_TTL = int(os.environ.get("SKILLRACK_EXPORT_JOB_TTL", 3600))
+
+# Job fields returned to clients; the rest (file path, media type) stay internal
+PUBLIC_FIELDS = ("id", "status", "done", "total", "filename", "error", "created", "finished")
+
+_JOBS = {}
+_LOCK = threading.Lock()
+_POOL = None
+
+def get_pool():
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadPoolExecutor(max_workers=max(1, EXPORT_JOB_WORKERS), thread_name_prefix="export-job")
+    return _POOL
+
+def shutdown():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(cancel_futures=True)
+        _POOL = None
+
+def submit(render_fn, args, filename, media_type):
+    """
+    Queue render_fn(*args, output=f, progress=cb) and return the new job's
+    status. Progress is reported by the renderer as (done, total) units.
+    """
+    sweep()
+    sweep_files()
+    job_id = uuid.uuid4().hex
+    job = {"id": job_id, "status": "queued", "done": 0, "total": None, "filename": filename, "error": None,
+           "created": time.time(), "finished": None, "path": None, "media_type": media_type}
+    with _LOCK:
+        _JOBS[job_id] = job
+    get_pool().submit(_run, job_id, render_fn, args)
+    return status(job_id)
+
+def _update(job_id, **fields):
+    with _LOCK:
+        if job_id in _JOBS: _JOBS[job_id].update(fields)
+
+def _run(job_id, render_fn, args):
+    _update(job_id, status="running")
+    os.makedirs(EXPORT_JOB_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_JOB_DIR, f"{job_id}.export")
+    tmp_path = f"{path}.tmp"
+
+    def progress(done, total):
+        _update(job_id, done=done, total=total)
+
+    try:
+        with open(tmp_path, 'wb') as out:
+            render_fn(*args, output=out, progress=progress)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        _remove(tmp_path)
+        _update(job_id, status="failed", error=str(e) or type(e).__name__, finished=time.time())
+        return
+    _update(job_id, status="done", path=path, finished=time.time())
+
+def get(job_id):
+    """Full job record (a copy), or None if unknown or expired."""
+    sweep()
+    with _LOCK:
+        job = _JOBS.get(job_id)
+        return None if job is None else dict(job)
+
+def status(job_id):
+    job = get(job_id)
+    return None if job is None else {field: job[field] for field in PUBLIC_FIELDS}
+
+def sweep(now=None):
+    """Forget jobs that finished more than EXPORT_JOB_TTL seconds ago and delete their files."""
+    now = time.time() if now is None else now
+    with _LOCK:
+        expired = [job for job in _JOBS.values() if job["finished"] is not None and now - job["finished"] > EXPORT_JOB_TTL]
+        for job in expired:
+            del _JOBS[job["id"]]
+    for job in expired:
+        if job["path"]: _remove(job["path"])
+
+def sweep_files(now=None):
+    """Delete expired files no job refers to, e.g. ones left behind by an earlier server run."""
+    now = time.time() if now is None else now
+    if not os.path.isdir(EXPORT_JOB_DIR):
+        return
+    with _LOCK:
+        known = set(_JOBS)
+    for name in os.listdir(EXPORT_JOB_DIR):
+        if name.split(".", 1)[0] in known: continue
+        path = os.path.join(EXPORT_JOB_DIR, name)
+        try:
+            if now - os.stat(path).st_mtime > EXPORT_JOB_TTL: _remove(path)
+        except FileNotFoundError:
+            pass
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
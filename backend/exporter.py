@@ -1,15 +1,80 @@
 import pandas as pd
+import numpy as np
+import csv
+import importlib.util
 import io
+import json
+import multiprocessing
+import os
+import re
+import weakref
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import xlsxwriter
 
-def write_formatted_sheet(workbook, worksheet, final_df, detected_date_str, years_text):
-    title_fmt = workbook.add_format({'bold': True, 'font_size': 14, 'align': 'center', 'valign': 'vcenter'})
-    subtitle_fmt = workbook.add_format({'bold': True, 'font_size': 12, 'align': 'center', 'valign': 'vcenter', 'bg_color': '#FFE699', 'border': 1})
-    date_fmt = workbook.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter', 'italic': True, 'border': 1})
-    header_fmt = workbook.add_format({'bold': True, 'bg_color': '#FFD966', 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True})
-    center_fmt = workbook.add_format({'align': 'center', 'valign': 'vcenter', 'border': 1})
-    total_fmt = workbook.add_format({'bold': True, 'bg_color': '#BDD7EE', 'border': 1, 'align': 'center', 'valign': 'vcenter'}) 
-    grand_total_fmt = workbook.add_format({'bold': True, 'bg_color': '#F4B084', 'border': 1, 'align': 'center', 'valign': 'vcenter'}) 
+# Bump when rendering changes; cached exports of older versions are then
+# never served again and age out of the export cache
+EXPORTER_VERSION = 2
+
+# Per-date ZIP bundles render one workbook per worker process; 0 or 1
+# renders them in the calling thread instead
+EXPORT_WORKERS = int(os.environ.get("SKILLRACK_EXPORT_WORKERS", min(4, os.cpu_count() or 1)))
+
+_POOL = None
+
+# Rendered downloads are sent to the client EXPORT_CHUNK_BYTES at a time
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Cell styles of the exported workbooks, by name
+REPORT_STYLES = {
+    'title': {'bold': True, 'font_size': 14, 'align': 'center', 'valign': 'vcenter'},
+    'subtitle': {'bold': True, 'font_size': 12, 'align': 'center', 'valign': 'vcenter', 'bg_color': '#FFE699', 'border': 1},
+    'date': {'bold': True, 'align': 'center', 'valign': 'vcenter', 'italic': True, 'border': 1},
+    'header': {'bold': True, 'bg_color': '#FFD966', 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True},
+    'center': {'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'total': {'bold': True, 'bg_color': '#BDD7EE', 'border': 1, 'align': 'center', 'valign': 'vcenter'},
+    'grand_total': {'bold': True, 'bg_color': '#F4B084', 'border': 1, 'align': 'center', 'valign': 'vcenter'},
+    'list_header': {'bold': True, 'bg_color': '#FFD966', 'border': 1},
+    'section_header': {'bold': True, 'font_size': 12, 'bg_color': '#4472C4', 'font_color': 'white', 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'perf_header': {'bold': True, 'bg_color': '#B4C7E7', 'border': 1, 'align': 'center', 'valign': 'vcenter'},
+    'rank': {'align': 'center', 'valign': 'vcenter', 'border': 1, 'bold': True},
+    'gold': {'align': 'center', 'valign': 'vcenter', 'border': 1, 'bg_color': '#FFD700', 'bold': True},
+    'silver': {'align': 'center', 'valign': 'vcenter', 'border': 1, 'bg_color': '#C0C0C0', 'bold': True},
+    'bronze': {'align': 'center', 'valign': 'vcenter', 'border': 1, 'bg_color': '#CD7F32', 'bold': True},
+}
+
+# Format objects are created once per workbook and shared by every sheet
+_WORKBOOK_FORMATS = weakref.WeakKeyDictionary()
+
+def workbook_formats(workbook):
+    """Style name -> Format for `workbook`; formats never used by a cell are not written out."""
+    formats = _WORKBOOK_FORMATS.get(workbook)
+    if formats is None:
+        formats = {name: workbook.add_format(props) for name, props in REPORT_STYLES.items()}
+        _WORKBOOK_FORMATS[workbook] = formats
+    return formats
+
+REPORT_COL_KEYS = ["Branch", "Year", "No of Registered Students", "No of Students Appeared", "No of Students Absent", "Zero Problems Solved", "One Problem Solved", "Two Problems Solved", "Three Problems Solved"]
+
+def write_formatted_sheet(workbook, worksheet, records, detected_date_str, years_text):
+    """
+    Render one daily report. Every cell is written exactly once, top to
+    bottom; vertical merges go through merge_range(), which writes the
+    blanks under the merged cell itself.
+    """
+    fmt = workbook_formats(workbook)
+    title_fmt = fmt['title']
+    subtitle_fmt = fmt['subtitle']
+    date_fmt = fmt['date']
+    header_fmt = fmt['header']
+    center_fmt = fmt['center']
+    total_fmt = fmt['total']
+    grand_total_fmt = fmt['grand_total']
+
+    worksheet.set_column('A:A', 20) 
+    worksheet.set_column('B:B', 15) 
+    worksheet.set_column('C:I', 15)
 
     worksheet.merge_range('A1:I1', "OFFICE OF THE CONTROLLER OF EXAMINATIONS", title_fmt)
     worksheet.merge_range('A2:I2', f"Date: {detected_date_str}", date_fmt) 
@@ -19,107 +84,231 @@ def write_formatted_sheet(workbook, worksheet, final_df, detected_date_str, year
     worksheet.merge_range('B4:B5', "Year", header_fmt)
     worksheet.merge_range('C4:E4', "Student Strength Details", header_fmt)
     worksheet.merge_range('F4:I4', "No of Problems Solved", header_fmt)
-    
     col_names = ["Registered", "Appeared", "Absent", "Zero", "One", "Two", "Three"]
     for i, name in enumerate(col_names):
         worksheet.write(4, 2 + i, name, header_fmt)
 
     start_row = 5
-    col_keys = ["Branch", "Year", "No of Registered Students", "No of Students Appeared", "No of Students Absent", "Zero Problems Solved", "One Problem Solved", "Two Problems Solved", "Three Problems Solved"]
-    records = final_df.to_dict('records')
-
-    current_branch = None
-    branch_start_idx = -1
-
+    # Index of the last record of the current branch run
+    branch_end = -1
     for i, row_data in enumerate(records):
         row_idx = start_row + i
         branch_val = row_data['Branch']
         
-        if "OVERALL TOTAL" in str(branch_val):
-            if current_branch and branch_start_idx != -1:
-                if (row_idx - 1) > branch_start_idx:
-                    worksheet.merge_range(branch_start_idx, 0, row_idx - 1, 0, current_branch, center_fmt)
-                else:
-                    worksheet.write(branch_start_idx, 0, current_branch, center_fmt)
-            fmt = grand_total_fmt
-            worksheet.merge_range(row_idx, 0, row_idx, 1, "OVERALL TOTAL", fmt)
+        if "TOTAL" in str(branch_val):
+            fmt = grand_total_fmt if "OVERALL TOTAL" in str(branch_val) else total_fmt
+            worksheet.merge_range(row_idx, 0, row_idx, 1, "OVERALL TOTAL" if fmt is grand_total_fmt else "TOTAL", fmt)
             for col_num in range(2, 9):
-                worksheet.write(row_idx, col_num, row_data[col_keys[col_num]], fmt)
-        elif "TOTAL" in str(branch_val):
-            fmt = total_fmt
-            worksheet.merge_range(row_idx, 0, row_idx, 1, "TOTAL", fmt)
-            for col_num in range(2, 9):
-                worksheet.write(row_idx, col_num, row_data[col_keys[col_num]], fmt)
-            if current_branch and branch_start_idx != -1:
-                if (row_idx - 1) > branch_start_idx:
-                    worksheet.merge_range(branch_start_idx, 0, row_idx - 1, 0, current_branch, center_fmt)
-                else:
-                    worksheet.write(branch_start_idx, 0, current_branch, center_fmt)
-            current_branch = None
-            branch_start_idx = -1
-        else:
-            fmt = center_fmt
-            for col_num in range(9):
-                worksheet.write(row_idx, col_num, str(row_data[col_keys[col_num]]), fmt)
-            if branch_val != current_branch:
-                if current_branch is not None:
-                    if (row_idx - 1) > branch_start_idx:
-                        worksheet.merge_range(branch_start_idx, 0, row_idx - 1, 0, current_branch, center_fmt)
-                    else:
-                        worksheet.write(branch_start_idx, 0, current_branch, center_fmt)
-                current_branch = branch_val
-                branch_start_idx = row_idx
+                worksheet.write(row_idx, col_num, row_data[REPORT_COL_KEYS[col_num]], fmt)
+            continue
 
-    worksheet.set_column('A:A', 20) 
-    worksheet.set_column('B:B', 15) 
-    worksheet.set_column('C:I', 15)
+        # Column A carries the branch once per run of rows, merged down over the run
+        if i > branch_end:
+            branch_end = i
+            while branch_end + 1 < len(records) and records[branch_end + 1]['Branch'] == branch_val:
+                branch_end += 1
+            if branch_end > i:
+                worksheet.merge_range(row_idx, 0, start_row + branch_end, 0, branch_val, center_fmt)
+            else:
+                worksheet.write(row_idx, 0, branch_val, center_fmt)
+        for col_num in range(1, 9):
+            worksheet.write(row_idx, col_num, row_data[REPORT_COL_KEYS[col_num]], center_fmt)
 
-def generate_excel_report(reports_data):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        workbook = writer.book
-        for rep in reports_data:
-            df = pd.DataFrame(rep['data'])
-            sheet_name = f"{rep['date']}"[:31]
-            df.to_excel(writer, index=False, sheet_name=sheet_name, startrow=5, header=False)
-            write_formatted_sheet(workbook, writer.sheets[sheet_name], df, rep['date'], rep['years_text'])
-    return output.getvalue()
-
-def generate_weekly_excel(weekly_data):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df = pd.DataFrame(weekly_data)
-        df.to_excel(writer, index=False, sheet_name='Weekly Leaderboard')
-        
-        workbook = writer.book
-        worksheet = writer.sheets['Weekly Leaderboard']
-        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#FFD966', 'border': 1})
-        
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_fmt)
-            worksheet.set_column(col_num, col_num, 15)
-            
-    return output.getvalue()
-
-def generate_performance_excel(performance_data, branch, top_n):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df = pd.DataFrame(performance_data)
-        # Ensure Reg No is prominently placed if it exists
-        cols = df.columns.tolist()
-        if 'Reg No' in cols:
-            cols.insert(0, cols.pop(cols.index('Reg No')))
-            df = df[cols]
-            
-        sheet_name = f'Top {top_n} {branch}'[:31]
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-        
-        workbook = writer.book
-        worksheet = writer.sheets[sheet_name]
-        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#FFD966', 'border': 1})
-        
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_fmt)
-            worksheet.set_column(col_num, col_num, 15)
-            
-    return output.getvalue()
+def generate_excel_report(reports_data, output=None, progress=None):
+    """
+    Daily analysis workbook; returns its bytes, or writes it into `output`
+    when given. `progress(done, total)` is called as sheets are written.
+    """
+    target = io.BytesIO() if output is None else output
+    # Not constant_memory: a vertical merge_range() pads the rows below it,
+    # which would flush its first row before the rest of that row is written.
+    # The sheets are small (one row per branch and year).
+    workbook = xlsxwriter.Workbook(target)
+    for rep in tracked(reports_data, progress, every=1):
+        worksheet = workbook.add_worksheet(f"{rep['date']}"[:31])
+        write_formatted_sheet(workbook, worksheet, rep['data'], rep['date'], rep['years_text'])
+    workbook.close()
+    return target.getvalue() if output is None else output
+
+# --- PER-DATE BUNDLES ---
+def get_pool():
+    global _POOL
+    if _POOL is None and EXPORT_WORKERS > 1:
+        # Forkserver workers, like the ingest pool: forking the threaded server
+        # could copy a lock held by another thread into the child
+        _POOL = ProcessPoolExecutor(max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _POOL
+
+def shutdown():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(cancel_futures=True)
+        _POOL = None
+
+def render_date_workbook(rep):
+    """One daily report as a standalone single-sheet workbook (runs inside a worker)."""
+    return generate_excel_report([rep])
+
+def _bundle_name(date, taken):
+    base = re.sub(r'[^\w.-]+', '_', str(date)) or "report"
+    name = f"{base}.xlsx"
+    n = 1
+    while name in taken:
+        n += 1
+        name = f"{base}_{n}.xlsx"
+    taken.add(name)
+    return name
+
+def generate_excel_zip(reports_data, output=None, progress=None):
+    """
+    Every daily report as its own workbook, rendered across the export
+    worker processes and bundled into a ZIP in report order.
+    """
+    target = io.BytesIO() if output is None else output
+    pool = get_pool()
+    rendered = map(render_date_workbook, reports_data) if pool is None else pool.map(render_date_workbook, reports_data)
+    taken = set()
+    try:
+        # The workbooks are already deflated; storing them avoids a second pass
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_STORED) as bundle:
+            for rep, data in zip(tracked(reports_data, progress, every=1), rendered):
+                bundle.writestr(_bundle_name(rep['date'], taken), data)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        shutdown()
+        raise
+    return target.getvalue() if output is None else output
+
+def write_records_sheet(workbook, worksheet, records, columns):
+    """Header row plus one row per record, in order; missing and NaN values stay blank."""
+    header_fmt = workbook_formats(workbook)['list_header']
+    for col_num, value in enumerate(columns):
+        worksheet.set_column(col_num, col_num, 15)
+        worksheet.write(0, col_num, value, header_fmt)
+    for row_num, record in enumerate(records, start=1):
+        for col_num, col in enumerate(columns):
+            value = record.get(col)
+            if _is_missing(value): continue
+            worksheet.write(row_num, col_num, value)
+
+def tracked(items, progress, every=1000):
+    """Iterate a list, reporting (done, total) to `progress` every `every` items and at the end."""
+    if progress is None:
+        yield from items
+        return
+    total = len(items)
+    for done, item in enumerate(items, start=1):
+        yield item
+        if done % every == 0: progress(done, total)
+    progress(total, total)
+
+def _is_missing(value):
+    return value is None or value is pd.NA or value is pd.NaT or (isinstance(value, (float, np.floating)) and value != value)
+
+def json_default(value):
+    """json `default=` hook: numpy scalars become Python numbers/booleans, anything else its str()."""
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+def _json_value(value):
+    return None if _is_missing(value) else value
+
+def record_columns(records):
+    # Same column order pd.DataFrame(records) would give
+    return list(dict.fromkeys(col for record in records for col in record))
+
+def performance_columns(records):
+    cols = record_columns(records)
+    # Ensure Reg No is prominently placed if it exists
+    if 'Reg No' in cols:
+        cols.insert(0, cols.pop(cols.index('Reg No')))
+    return cols
+
+# Columns of the flattened daily export (helper columns like Year_Sort are left out)
+DAILY_RECORD_COLUMNS = ['Date'] + REPORT_COL_KEYS
+
+def daily_records(reports_data):
+    """Every daily report flattened into one record list, each row tagged with its Date."""
+    return [{'Date': rep['date'], **row} for rep in reports_data for row in rep['data']]
+
+def generate_weekly_excel(weekly_data, output=None, progress=None):
+    target = io.BytesIO() if output is None else output
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Weekly Leaderboard')
+    write_records_sheet(workbook, worksheet, tracked(weekly_data, progress), record_columns(weekly_data))
+    workbook.close()
+    return target.getvalue() if output is None else output
+
+def generate_performance_excel(performance_data, branch, top_n, output=None, progress=None):
+    target = io.BytesIO() if output is None else output
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+    cols = performance_columns(performance_data)
+    worksheet = workbook.add_worksheet(f'Top {top_n} {branch}'[:31])
+    write_records_sheet(workbook, worksheet, tracked(performance_data, progress), cols)
+    workbook.close()
+    return target.getvalue() if output is None else output
+
+# --- STREAMED DOWNLOADS ---
+def iter_export(f, chunk_bytes=None):
+    """Read a rendered export in chunks, closing it when done."""
+    chunk_bytes = chunk_bytes or EXPORT_CHUNK_BYTES
+    try:
+        while block := f.read(chunk_bytes):
+            yield block
+    finally:
+        f.close()
+
+# --- PLAIN FORMATS ---
+# Unformatted exports of the same record lists, for scripts rather than people
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+def iter_csv(records, columns):
+    """CSV text of `records`, yielded in blocks of about EXPORT_CHUNK_BYTES."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for record in records:
+        writer.writerow(['' if _is_missing(v) else v for v in (record.get(col) for col in columns)])
+        if buf.tell() >= EXPORT_CHUNK_BYTES:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+def iter_jsonl(records, columns):
+    """One JSON object per line with keys in `columns` order; NaN becomes null."""
+    lines = []
+    size = 0
+    for record in records:
+        line = json.dumps({col: _json_value(record.get(col)) for col in columns}, default=json_default)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+            size = 0
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+def generate_parquet(records, columns, output=None, progress=None):
+    """Parquet file of `records`; needs pyarrow (check PARQUET_AVAILABLE first)."""
+    target = io.BytesIO() if output is None else output
+    df = pd.DataFrame(records, columns=columns)
+    # pyarrow rejects object columns mixing types (numeric and text Reg Nos)
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype(pd.StringDtype())
+    df.to_parquet(target, index=False, engine='pyarrow')
+    if progress is not None: progress(len(records), len(records))
+    return target.getvalue() if output is None else output
+
+def _write_blocks(blocks, output):
+    target = io.BytesIO() if output is None else output
+    for block in blocks:
+        target.write(block)
+    return target.getvalue() if output is None else output
+
+def generate_csv(records, columns, output=None, progress=None):
+    return _write_blocks(iter_csv(tracked(records, progress), columns), output)
+
+def generate_jsonl(records, columns, output=None, progress=None):
+    return _write_blocks(iter_jsonl(tracked(records, progress), columns), output)
@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+import processor
+
+# --- INGESTION CONFIG ---
+# Uploaded files are parsed one per worker process; 0 or 1 parses on a thread instead
+INGEST_WORKERS = int(os.environ.get("SKILLRACK_INGEST_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Streaming mode reads CSV uploads this many rows at a time
+STREAM_CHUNK_ROWS = int(os.environ.get("SKILLRACK_STREAM_CHUNK_ROWS", 100_000))
+
+# Uploads are copied to spool files in blocks of SPOOL_BLOCK_BYTES. Request
+# bodies over MAX_UPLOAD_BYTES are cut off while they are received (see
+# main.UploadSizeLimit); spool_uploads applies the same cap to the files' total
+SPOOL_DIR = os.environ.get("SKILLRACK_SPOOL_DIR") or None
+SPOOL_BLOCK_BYTES = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("SKILLRACK_MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+
+_POOL = None
+
+class UploadTooLarge(Exception):
+    pass
+
+class IngestError(Exception):
+    """One or more uploaded files could not be parsed; `errors` maps filename -> message."""
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {msg}" for name, msg in errors.items()))
+
+def get_pool():
+    global _POOL
+    if _POOL is None and INGEST_WORKERS > 1:
+        # Workers come from a forkserver, never a fork of this multi-threaded
+        # server, so they cannot inherit a lock some other thread was holding
+        _POOL = ProcessPoolExecutor(max_workers=INGEST_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _POOL
+
+def shutdown():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(cancel_futures=True)
+        _POOL = None
+
+async def spool_uploads(files, max_bytes=None):
+    """
+    Copy UploadFiles to temporary files block by block, hashing as we go.
+    Returns [(filename, path, upload_id), ...]; the caller removes the paths
+    with discard(). Raises UploadTooLarge as soon as the files' total passes
+    max_bytes. By now Starlette has already received the body, so this only
+    limits what gets copied and parsed; the early cut-off is the middleware's.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    spooled = []
+    total = 0
+    try:
+        for file in files or []:
+            digest = hashlib.sha256()
+            fd, path = tempfile.mkstemp(prefix="upload-", dir=SPOOL_DIR)
+            spooled.append((file.filename, path, None))
+            with os.fdopen(fd, "wb") as out:
+                while block := await file.read(SPOOL_BLOCK_BYTES):
+                    total += len(block)
+                    if total > max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                    digest.update(block)
+                    out.write(block)
+            spooled[-1] = (file.filename, path, digest.hexdigest())
+    except BaseException:
+        discard(spooled)
+        raise
+    return spooled
+
+def discard(spooled):
+    for _, path, _ in spooled:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+@contextmanager
+def _opened(path, filename):
+    """
+    What _read_upload reads from: a CSV's path (its header sniff is a cheap
+    separate read), or the workbook opened once for both the header sniff and
+    the data, so its sheet XML and shared strings are loaded a single time.
+    """
+    if filename.endswith('.csv'):
+        yield path
+        return
+    with pd.ExcelFile(path) as workbook:
+        yield workbook
+
+def _read_upload(source, filename, **kwargs):
+    if filename.endswith('.csv'):
+        return pd.read_csv(source, memory_map=True, **kwargs)
+    return source.parse(**kwargs)
+
+def _column_selection(source, filename):
+    """
+    Sniff the header row only: positions of the columns the analysis can use
+    (for usecols) and the dtypes to read them with.
+    """
+    headers = _read_upload(source, filename, nrows=0).columns
+    usecols = []
+    dtype = {}
+    for pos, (header, standard) in enumerate(zip(headers, processor.match_result_columns(headers))):
+        if standard is None: continue
+        usecols.append(pos)
+        if standard in processor.RES_COL_DTYPES:
+            dtype[header] = processor.RES_COL_DTYPES[standard]
+    return usecols, dtype
+
+def _coerce_counts(df):
+    for col in processor.COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+    return df
+
+def parse_upload(path, filename):
+    """Read one spooled upload and standardize its columns (runs inside a worker)."""
+    with _opened(path, filename) as source:
+        usecols, dtype = _column_selection(source, filename)
+        df = _read_upload(source, filename, usecols=usecols, dtype=dtype)
+    return _coerce_counts(processor.standardize_columns(df))
+
+async def parse_uploads(uploads):
+    """
+    Parse spooled [(filename, path), ...] concurrently without blocking the event
+    loop. Returns the standardized frames in input order, or raises
+    IngestError naming every file that failed.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    tasks = [loop.run_in_executor(pool, parse_upload, path, filename) for filename, path in uploads]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    if any(isinstance(result, BrokenProcessPool) for result in results):
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        shutdown()
+
+    errors = {}
+    for (filename, _), result in zip(uploads, results):
+        if isinstance(result, Exception):
+            errors[filename] = str(result) or type(result).__name__
+    if errors:
+        raise IngestError(errors)
+    return results
+
+# --- STREAMING MODE ---
+def iter_upload_chunks(path, filename, chunksize=None):
+    """
+    Yield standardized chunks of one spooled upload. The column mapping is
+    resolved on the first chunk and reused for the rest of the file.
+    """
+    chunksize = chunksize or STREAM_CHUNK_ROWS
+    try:
+        with _opened(path, filename) as source:
+            usecols, dtype = _column_selection(source, filename)
+            if filename.endswith('.csv'):
+                reader = _read_upload(source, filename, usecols=usecols, dtype=dtype, chunksize=chunksize)
+            else:
+                # Excel has no incremental reader; the sheet arrives as one chunk
+                reader = iter([_read_upload(source, filename, usecols=usecols, dtype=dtype)])
+        positions = names = None
+        try:
+            while True:
+                chunk = next(reader, None)
+                if chunk is None: return
+                if positions is None:
+                    positions, names = processor.column_plan(chunk)
+                chunk = chunk.iloc[:, positions]
+                chunk.columns = names
+                yield _coerce_counts(chunk)
+        finally:
+            if hasattr(reader, 'close'): reader.close()
+    except (ValueError, OSError, pd.errors.ParserError) as e:
+        raise IngestError({filename: str(e) or type(e).__name__}) from e
+
+def iter_frame_chunks(df, chunksize=None):
+    """Already standardized frame (e.g. from the upload store) in row slices."""
+    chunksize = chunksize or STREAM_CHUNK_ROWS
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def _aligned_chunks(sources, tag_source):
+    """
+    Chunks from [(filename, chunk iterator), ...] in order, each carrying the
+    union of every source's columns, exactly as pd.concat would lay them out.
+    Only the first chunk of each source is held ahead of time.
+    """
+    firsts = []
+    columns = {}
+    for filename, chunks in sources:
+        first = next(chunks, None)
+        firsts.append(first)
+        if first is not None:
+            columns.update(dict.fromkeys(first.columns))
+    if tag_source: columns['Source_Filename'] = None
+    columns = list(columns)
+
+    for (filename, chunks), first in zip(sources, firsts):
+        if first is None: continue
+        for chunk in _prepend(first, chunks):
+            chunk = chunk.reindex(columns=columns)
+            if tag_source: chunk['Source_Filename'] = filename
+            yield chunk
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
+
+def stream_daily_reports(sources):
+    """
+    generate_daily_reports over chunked sources without concatenating them,
+    plus the student-day rows folded from the same cleaned chunks (None
+    without Reg No and Name columns); returns (reports, daily_student).
+    """
+    counts = None
+    daily_student = None
+    formats = {}
+    # Branch/Year forward-fill runs across chunk and file boundaries, as it
+    # would over the concatenated frame
+    carry = {'Branch': None, 'Year': None}
+    for chunk in _aligned_chunks(sources, tag_source=True):
+        for col, last in carry.items():
+            filled = chunk[col].astype(object).ffill()
+            if last is not None: filled = filled.fillna(last)
+            chunk[col] = filled
+            if len(filled) and pd.notna(filled.iloc[-1]): carry[col] = filled.iloc[-1]
+        processor.prepare_daily_frame(chunk, formats)
+        counts = processor.merge_daily_counts(counts, processor.count_daily_buckets(chunk))
+        part = processor.daily_student_days(chunk)
+        if part is not None:
+            daily_student = processor.merge_student_days(daily_student, part, True)
+    return processor.build_daily_reports(counts), daily_student
+
+def stream_student_days(sources):
+    """Student-day table of chunked sources, folding per-chunk maxima; returns (daily_student, has_reg)."""
+    daily_student = None
+    has_reg = False
+    formats = {}
+    for chunk in _aligned_chunks(sources, tag_source=False):
+        has_reg = 'Reg No' in chunk.columns
+        part = processor.aggregate_student_days(processor.prepare_weekly_frame(chunk, formats), has_reg)
+        daily_student = processor.merge_student_days(daily_student, part, has_reg)
+    return daily_student, has_reg
+
+def stream_weekly_report(sources):
+    """generate_weekly_report over chunked sources without concatenating them."""
+    daily_student, has_reg = stream_student_days(sources)
+    if daily_student is None:
+        return []
+    return processor.build_weekly_report(daily_student, has_reg)
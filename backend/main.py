@@ -1,14 +1,51 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import List, Optional
 import pandas as pd
-import io
+import asyncio
+import hashlib
 import json
-from fastapi.responses import StreamingResponse
-import processor, database, exporter
+import os
+from datetime import datetime
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+import processor, database, exporter, export_cache, export_jobs, upload_store, ingest
 
 app = FastAPI(title="Skill Rack Analysis API")
 
+class UploadSizeLimit:
+    """
+    Reject request bodies over ingest.MAX_UPLOAD_BYTES while they arrive.
+    An oversized Content-Length gets a 413 before anything is read; bodies
+    without one (chunked uploads) are counted as they stream in and cut off
+    with a 413 once they pass the limit, before Starlette buffers the rest.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = ingest.MAX_UPLOAD_BYTES
+        detail = f"Upload exceeds the {limit} byte limit"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            return await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+
+        received = 0
+        async def counted_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                # FastAPI re-raises HTTPExceptions from body parsing as they are
+                if received > limit: raise HTTPException(status_code=413, detail=detail)
+            return message
+        await self.app(scope, counted_receive, send)
+
+# Registered before CORS so the 413 still carries the CORS headers
+app.add_middleware(UploadSizeLimit)
+
 # Enable CORS for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -16,12 +53,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Upload-Ids", "X-Total-Count", "X-Window-Start", "X-Window-End"],
 )
 
+# Optional roster file that overrides the built-in registered strength
+STRENGTH_FILE = os.environ.get("SKILLRACK_STRENGTH_FILE")
+
 # Initialize DB on startup
 @app.on_event("startup")
 async def startup_event():
     database.init_db()
+    if STRENGTH_FILE and os.path.exists(STRENGTH_FILE):
+        processor.load_strength_file(STRENGTH_FILE, STRENGTH_FILE)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    ingest.shutdown()
+    export_jobs.shutdown()
+    exporter.shutdown()
+    database.close_all()
 
 # Store current report data in memory for download (simplification for this phase)
 # In a real app, this should be in a cache or temporary storage
@@ -29,94 +79,430 @@ async def startup_event():
 CURRENT_REPORTS = []
 CURRENT_WEEKLY = []
 CURRENT_PERFORMANCE = []
+# Ranked weekly aggregations of the last /performance dataset, indexed by
+# branch/year: scope (a branch, or None for every branch) -> leaderboard.
+# Other scopes are built on demand from the dataset's stored uploads.
+CURRENT_LEADERBOARDS = {}
+CURRENT_PERF_UPLOADS = []
 PERF_INFO = {"branch": "OVERALL", "top_n": 50}
 
-@app.post("/process")
-async def process_files(files: List[UploadFile] = File(...)):
-    global CURRENT_REPORTS
-    # ... existing processing code ... (preserving logic)
+async def spool(files):
+    try:
+        return await ingest.spool_uploads(files)
+    except ingest.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def load_uploads(files, upload_ids):
+    """
+    Standardized frames for fresh files and/or previously returned upload IDs,
+    as (upload_id, filename, df). Files already in the store skip parsing;
+    the rest are parsed in parallel by the ingestion pool.
+    """
+    spooled = await spool(files)
+    try:
+        loaded = []
+        # upload_id -> (filename, path, positions in loaded); the same file
+        # sent twice in one request is parsed once
+        to_parse = {}
+        for filename, path, upload_id in spooled:
+            df = await run_in_threadpool(upload_store.get, upload_id)
+            if df is None:
+                to_parse.setdefault(upload_id, (filename, path, []))[2].append(len(loaded))
+            loaded.append([upload_id, filename, df])
+
+        if to_parse:
+            try:
+                frames = await ingest.parse_uploads([(filename, path) for filename, path, _ in to_parse.values()])
+            except ingest.IngestError as e:
+                raise HTTPException(status_code=400, detail=f"Could not read uploaded file(s): {e}")
+            for (upload_id, (filename, _, positions)), df in zip(to_parse.items(), frames):
+                await run_in_threadpool(upload_store.put, upload_id, df, filename)
+                # Callers tag each frame with its own filename, so repeats get a copy
+                for i, pos in enumerate(positions):
+                    loaded[pos][2] = df if i == 0 else df.copy()
+    finally:
+        ingest.discard(spooled)
+
+    for upload_id in upload_ids or []:
+        df = await run_in_threadpool(load_stored, upload_id)
+        loaded.append([upload_id, df.attrs.get('source_filename', upload_id), df])
+    if not loaded: raise HTTPException(status_code=400, detail="No valid files uploaded")
+    return loaded
+
+def load_stored(upload_id):
+    try:
+        df = upload_store.get(upload_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if df is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found, please upload the file again")
+    return df
+
+async def stream_sources(files, upload_ids):
+    """
+    (filename, chunk iterator) pairs for streaming mode plus the spool files
+    backing them. Fresh files are parsed lazily chunk by chunk and are not
+    added to the upload store.
+    """
+    spooled = await spool(files)
+    sources = [(filename, ingest.iter_upload_chunks(path, filename)) for filename, path, _ in spooled]
+    try:
+        for upload_id in upload_ids or []:
+            df = await run_in_threadpool(load_stored, upload_id)
+            sources.append((df.attrs.get('source_filename', upload_id), ingest.iter_frame_chunks(df)))
+    except HTTPException:
+        ingest.discard(spooled)
+        raise
+    if not sources: raise HTTPException(status_code=400, detail="No valid files uploaded")
+    return sources, spooled
+
+async def run_streaming(build, files, upload_ids):
+    sources, spooled = await stream_sources(files, upload_ids)
+    try:
+        return await run_in_threadpool(build, sources)
+    except ingest.IngestError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read uploaded file(s): {e}")
+    finally:
+        ingest.discard(spooled)
+
+def record_student_days(daily_student, has_reg):
+    # The persisted student-day table is keyed by registration number
+    if has_reg and daily_student is not None:
+        database.upsert_student_days(processor.student_day_rows(daily_student))
+
+def upload_ids_header(loaded):
+    return {"X-Upload-Ids": ",".join(upload_id for upload_id, _, _ in loaded)}
+
+@app.post("/uploads")
+async def create_uploads(files: List[UploadFile] = File(...)):
+    loaded = await load_uploads(files, None)
+    return [{"upload_id": upload_id, "filename": filename, "rows": len(df)} for upload_id, filename, df in loaded]
+
+def build_daily(loaded):
+    """Daily reports of the loaded uploads, plus their student-day rows when they have Reg No and Name."""
     all_dfs = []
-    for file in files:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents)) if file.filename.endswith('.csv') else pd.read_excel(io.BytesIO(contents))
-        df = processor.standardize_columns(df)
-        df['Source_Filename'] = file.filename
+    for _, filename, df in loaded:
+        df['Source_Filename'] = filename
         all_dfs.append(df)
-    
-    if not all_dfs: raise HTTPException(status_code=400, detail="No valid files uploaded")
-    combined_df = pd.concat(all_dfs, ignore_index=True)
-    CURRENT_REPORTS = processor.generate_daily_reports(combined_df)
-    for rep in CURRENT_REPORTS:
-        database.save_report("Upload", "Multiple", rep['date'], pd.DataFrame(rep['data']))
+    combined_df = processor.prepare_daily_frame(pd.concat(all_dfs, ignore_index=True))
+    reports = processor.build_daily_reports(processor.count_daily_buckets(combined_df))
+    # Student-day rows come from the same cleaned frame
+    return reports, processor.daily_student_days(combined_df)
+
+@app.post("/process")
+async def process_files(response: Response, files: Optional[List[UploadFile]] = File(None), upload_ids: Optional[List[str]] = Form(None), stream: bool = Form(False)):
+    global CURRENT_REPORTS
+    if stream:
+        # Bounded-memory mode for very large exports: CSVs are read in chunks
+        CURRENT_REPORTS, daily_student = await run_streaming(ingest.stream_daily_reports, files, upload_ids)
+    else:
+        loaded = await load_uploads(files, upload_ids)
+        CURRENT_REPORTS, daily_student = await run_in_threadpool(build_daily, loaded)
+        response.headers.update(upload_ids_header(loaded))
+    await run_in_threadpool(record_student_days, daily_student, daily_student is not None)
+    # Every date of the upload is saved in one transaction, off the event loop
+    await run_in_threadpool(database.save_reports, [("Upload", "Multiple", rep['date'], pd.DataFrame(rep['data'])) for rep in CURRENT_REPORTS])
     return CURRENT_REPORTS
 
+# Seconds between job status checks on an /exports/{id}/events stream
+EXPORT_EVENT_INTERVAL = 0.5
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# format= values accepted by the /download endpoints, besides the default xlsx
+# format -> (media type, row streamer or None, file renderer)
+RECORD_FORMATS = {
+    "csv": ("text/csv", exporter.iter_csv, exporter.generate_csv),
+    "jsonl": ("application/x-ndjson", exporter.iter_jsonl, exporter.generate_jsonl),
+    "parquet": ("application/vnd.apache.parquet", None, exporter.generate_parquet),
+}
+
+def record_format(fmt):
+    if fmt not in RECORD_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    if fmt == "parquet" and not exporter.PARQUET_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet export needs pyarrow installed on the server")
+    return RECORD_FORMATS[fmt]
+
+def export_source(kind):
+    """
+    What the current `kind` report exports: (base filename, (xlsx renderer,
+    *args), records, columns) for the unformatted formats.
+    """
+    if kind == "daily":
+        if not CURRENT_REPORTS: raise HTTPException(status_code=400, detail="No daily reports available")
+        return ("Skill_Rack_Daily_Analysis", (exporter.generate_excel_report, CURRENT_REPORTS),
+                exporter.daily_records(CURRENT_REPORTS), exporter.DAILY_RECORD_COLUMNS)
+    if kind == "weekly":
+        if not CURRENT_WEEKLY: raise HTTPException(status_code=400, detail="No weekly report available")
+        return ("Skill_Rack_Weekly_Leaderboard", (exporter.generate_weekly_excel, CURRENT_WEEKLY),
+                CURRENT_WEEKLY, exporter.record_columns(CURRENT_WEEKLY))
+    if kind == "performance":
+        if not CURRENT_PERFORMANCE: raise HTTPException(status_code=400, detail="No performance analysis available")
+        return (f"Skill_Rack_Top_Performers_{PERF_INFO['branch']}", (exporter.generate_performance_excel, CURRENT_PERFORMANCE, PERF_INFO['branch'], PERF_INFO['top_n']),
+                CURRENT_PERFORMANCE, exporter.performance_columns(CURRENT_PERFORMANCE))
+    raise HTTPException(status_code=400, detail=f"Unknown export kind: {kind}")
+
+def etag_matches(request, etag):
+    # If-None-Match may list several tags or "*"; weak tags compare equal
+    header = request.headers.get("if-none-match")
+    if not header: return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+def not_modified(request, etag):
+    """304 response if the client already holds `etag`, else None."""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+async def cached_download(request, filename, media_type, render, *args):
+    # Exports are cached by content: an unchanged report is rendered once,
+    # and a client that already has it gets a 304
+    key = await run_in_threadpool(export_cache.export_key, render, *args)
+    etag = f'"{key}"'
+    cached = not_modified(request, etag)
+    if cached: return cached
+    f = await run_in_threadpool(export_cache.open_cached, key)
+    if f is None:
+        f = await run_in_threadpool(export_cache.render, key, render, *args)
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Content-Length": str(os.fstat(f.fileno()).st_size),
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+    }
+    return StreamingResponse(exporter.iter_export(f), media_type=media_type, headers=headers)
+
+def file_export(kind, fmt):
+    """(renderer, args, filename, media type) that writes the current `kind` report as a `fmt` file."""
+    basename, xlsx, records, columns = export_source(kind)
+    if fmt == "xlsx":
+        return xlsx[0], xlsx[1:], f"{basename}.xlsx", XLSX_MEDIA_TYPE
+    if fmt == "zip":
+        # One workbook per date, rendered in parallel
+        if kind != "daily": raise HTTPException(status_code=400, detail="ZIP bundles are only available for the daily report")
+        return exporter.generate_excel_zip, (CURRENT_REPORTS,), f"{basename}.zip", "application/zip"
+    media_type, _, render = record_format(fmt)
+    return render, (records, columns), f"{basename}.{fmt}", media_type
+
+async def records_download(request, fmt, basename, records, columns):
+    """CSV/JSONL export of a record list, streamed row by row."""
+    media_type, iter_rows, _ = record_format(fmt)
+    filename = f"{basename}.{fmt}"
+    etag = '"{}"'.format(await run_in_threadpool(export_cache.export_key, iter_rows, records, columns))
+    cached = not_modified(request, etag)
+    if cached: return cached
+    headers = {"Content-Disposition": f"attachment; filename={filename}", "ETag": etag, "Cache-Control": "no-cache"}
+    return StreamingResponse(iter_rows(records, columns), media_type=media_type, headers=headers)
+
+async def current_download(request, kind, fmt):
+    if fmt in RECORD_FORMATS and RECORD_FORMATS[fmt][1] is not None:
+        basename, _, records, columns = export_source(kind)
+        return await records_download(request, fmt, basename, records, columns)
+    render, args, filename, media_type = file_export(kind, fmt)
+    return await cached_download(request, filename, media_type, render, *args)
+
 @app.get("/download/daily")
-async def download_daily():
-    if not CURRENT_REPORTS: raise HTTPException(status_code=400, detail="No daily reports available")
-    excel_data = exporter.generate_excel_report(CURRENT_REPORTS)
-    return StreamingResponse(io.BytesIO(excel_data), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": "attachment; filename=Skill_Rack_Daily_Analysis.xlsx"})
+async def download_daily(request: Request, fmt: str = Query("xlsx", alias="format")):
+    return await current_download(request, "daily", fmt)
+
+def build_student_days(loaded):
+    """(daily_student, has_reg) of the loaded uploads."""
+    df_weekly = processor.prepare_weekly_frame(pd.concat([df for _, _, df in loaded], ignore_index=True))
+    has_reg = 'Reg No' in df_weekly.columns
+    return processor.aggregate_student_days(df_weekly, has_reg), has_reg
 
 @app.post("/weekly")
-async def process_weekly(files: List[UploadFile] = File(...)):
+async def process_weekly(response: Response, files: Optional[List[UploadFile]] = File(None), upload_ids: Optional[List[str]] = Form(None), stream: bool = Form(False)):
     global CURRENT_WEEKLY
-    # ... existing processing code ...
-    all_dfs = []
-    for file in files:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents)) if file.filename.endswith('.csv') else pd.read_excel(io.BytesIO(contents))
-        df = processor.standardize_columns(df)
-        all_dfs.append(df)
-    
-    if not all_dfs: raise HTTPException(status_code=400, detail="No valid files uploaded")
-    combined_df = pd.concat(all_dfs, ignore_index=True)
-    CURRENT_WEEKLY = processor.generate_weekly_report(combined_df)
+    if stream:
+        daily_student, has_reg = await run_streaming(ingest.stream_student_days, files, upload_ids)
+    else:
+        loaded = await load_uploads(files, upload_ids)
+        daily_student, has_reg = await run_in_threadpool(build_student_days, loaded)
+        response.headers.update(upload_ids_header(loaded))
+    await run_in_threadpool(record_student_days, daily_student, has_reg)
+    CURRENT_WEEKLY = await run_in_threadpool(processor.build_weekly_report, daily_student, has_reg) if daily_student is not None else []
     return CURRENT_WEEKLY
 
+@app.get("/leaderboard")
+def get_stored_leaderboard(start: Optional[str] = None, end: Optional[str] = None):
+    """Leaderboard for any date window (YYYY-MM-DD, inclusive) from the stored student-day partials."""
+    for value in (start, end):
+        if value is None: continue
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid date {value}, expected YYYY-MM-DD")
+    if start and end and start > end: raise HTTPException(status_code=400, detail="start must not be after end")
+    return processor.build_stored_leaderboard(database.get_student_leaderboard(start, end))
+
+@app.get("/leaderboard/{window}")
+def get_rolling_leaderboard(window: str, response: Response, branch: Optional[str] = None, year: Optional[str] = None):
+    """Rolling 7d / 30d / semester leaderboard, ending on the latest ingested day."""
+    if window not in database.ROLLING_WINDOWS:
+        raise HTTPException(status_code=404, detail=f"Unknown window {window}, expected one of {', '.join(database.ROLLING_WINDOWS)}")
+    branch = None if branch in (None, "", "OVERALL") else branch
+    start, end, totals = database.get_window_leaderboard(window, branch, year or None)
+    if start is not None:
+        response.headers.update({"X-Window-Start": start, "X-Window-End": end})
+    return processor.build_stored_leaderboard(totals)
+
 @app.get("/download/weekly")
-async def download_weekly():
-    if not CURRENT_WEEKLY: raise HTTPException(status_code=400, detail="No weekly report available")
-    excel_data = exporter.generate_weekly_excel(CURRENT_WEEKLY)
-    return StreamingResponse(io.BytesIO(excel_data), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": "attachment; filename=Skill_Rack_Weekly_Leaderboard.xlsx"})
+async def download_weekly(request: Request, fmt: str = Query("xlsx", alias="format")):
+    return await current_download(request, "weekly", fmt)
+
+def branch_scope(branch):
+    return None if branch in (None, "", "OVERALL") else branch
+
+def build_scoped_leaderboard(frames, scope):
+    # Single-department scopes drop other branches file by file, before the
+    # concat, date extraction and duration parsing ever see those rows
+    all_dfs = [df if scope is None else processor.filter_branch(df, scope) for df in frames]
+    combined_df = pd.concat(all_dfs, ignore_index=True)
+    weekly = [] if combined_df.empty else processor.generate_weekly_report(combined_df)
+    return processor.build_leaderboard(weekly, scope)
+
+def scoped_leaderboard(branch):
+    """
+    The leaderboard that serves `branch`: the all-branch one if it was built,
+    else that branch's own, ranked from the stored uploads on first use.
+    """
+    if None in CURRENT_LEADERBOARDS: return CURRENT_LEADERBOARDS[None]
+    scope = branch_scope(branch)
+    if scope not in CURRENT_LEADERBOARDS:
+        frames = [load_stored(upload_id) for upload_id in CURRENT_PERF_UPLOADS]
+        CURRENT_LEADERBOARDS[scope] = build_scoped_leaderboard(frames, scope)
+    return CURRENT_LEADERBOARDS[scope]
 
 @app.post("/performance")
-async def process_performance(files: List[UploadFile] = File(...), top_n: int = Form(50), branch: str = Form("OVERALL")):
-    global CURRENT_PERFORMANCE, PERF_INFO
+async def process_performance(response: Response, files: Optional[List[UploadFile]] = File(None), upload_ids: Optional[List[str]] = Form(None), top_n: int = Form(50), branch: str = Form("OVERALL")):
+    global CURRENT_PERFORMANCE, CURRENT_LEADERBOARDS, CURRENT_PERF_UPLOADS, PERF_INFO
     PERF_INFO = {"branch": branch, "top_n": top_n}
-    # ... same as before but now with global storage ...
-    all_dfs = []
-    for file in files:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents)) if file.filename.endswith('.csv') else pd.read_excel(io.BytesIO(contents))
-        df = processor.standardize_columns(df)
-        all_dfs.append(df)
-    if not all_dfs: raise HTTPException(status_code=400, detail="No valid files uploaded")
+    loaded = await load_uploads(files, upload_ids)
+    response.headers.update(upload_ids_header(loaded))
+    scope = branch_scope(branch)
     try:
-        combined_df = pd.concat(all_dfs, ignore_index=True)
-        if branch != "OVERALL":
-            combined_df['Branch'] = combined_df['Branch'].apply(processor.normalize_branch)
-            combined_df = combined_df[combined_df['Branch'] == branch]
-        if combined_df.empty: return []
-        aggregated_data = processor.generate_weekly_report(combined_df) 
-        CURRENT_PERFORMANCE = processor.get_top_performers(pd.DataFrame(aggregated_data), top_n)
-        return CURRENT_PERFORMANCE
+        # Aggregate and rank once; branch/top_n changes are then served from
+        # the index by /performance/leaderboard
+        board = await run_in_threadpool(build_scoped_leaderboard, [df for _, _, df in loaded], scope)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+    CURRENT_LEADERBOARDS = {scope: board}
+    CURRENT_PERF_UPLOADS = [upload_id for upload_id, _, _ in loaded]
+    total, CURRENT_PERFORMANCE = processor.leaderboard_slice(board, branch, None, top_n)
+    response.headers["X-Total-Count"] = str(total)
+    return CURRENT_PERFORMANCE
+
+@app.get("/performance/leaderboard")
+def get_leaderboard(response: Response, branch: str = "OVERALL", year: Optional[str] = None, top_n: int = 50, offset: int = 0):
+    global CURRENT_PERFORMANCE, PERF_INFO
+    if not CURRENT_LEADERBOARDS: raise HTTPException(status_code=400, detail="No performance analysis available")
+    if offset < 0: raise HTTPException(status_code=400, detail="offset must not be negative")
+    total, CURRENT_PERFORMANCE = processor.leaderboard_slice(scoped_leaderboard(branch), branch, year, top_n, offset)
+    PERF_INFO = {"branch": branch, "top_n": top_n}
+    response.headers["X-Total-Count"] = str(total)
+    return CURRENT_PERFORMANCE
 
 @app.get("/download/performance")
-async def download_performance():
-    if not CURRENT_PERFORMANCE: raise HTTPException(status_code=400, detail="No performance analysis available")
-    excel_data = exporter.generate_performance_excel(CURRENT_PERFORMANCE, PERF_INFO['branch'], PERF_INFO['top_n'])
-    return StreamingResponse(io.BytesIO(excel_data), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": f"attachment; filename=Skill_Rack_Top_Performers_{PERF_INFO['branch']}.xlsx"})
+async def download_performance(request: Request, fmt: str = Query("xlsx", alias="format")):
+    return await current_download(request, "performance", fmt)
 
 @app.get("/download")
-async def download_legacy():
+async def download_legacy(request: Request):
     # Keep as fallback for daily
-    return await download_daily()
+    return await download_daily(request, "xlsx")
+
+# --- EXPORT JOBS ---
+# Large exports render in the background: POST /exports returns a job id, then
+# poll GET /exports/{id} (or follow /exports/{id}/events) and fetch /download
+@app.post("/exports", status_code=202)
+def submit_export(kind: str = Form(...), fmt: str = Form("xlsx", alias="format")):
+    render, args, filename, media_type = file_export(kind, fmt)
+    return export_jobs.submit(render, args, filename, media_type)
+
+def job_or_404(job_id):
+    job = export_jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Unknown or expired export job")
+    return job
+
+@app.get("/exports/{job_id}")
+def get_export(job_id: str):
+    job_or_404(job_id)
+    return export_jobs.status(job_id)
+
+@app.get("/exports/{job_id}/events")
+async def export_events(job_id: str):
+    """Server-sent events: `progress` whenever the job advances, then one `done` or `failed`."""
+    job_or_404(job_id)
+
+    async def events():
+        last = None
+        while True:
+            state = export_jobs.status(job_id)
+            if state is None:
+                yield "event: failed\ndata: {\"error\": \"expired\"}\n\n"
+                return
+            if state["status"] in ("done", "failed"):
+                yield f"event: {state['status']}\ndata: {json.dumps(state)}\n\n"
+                return
+            if state != last:
+                yield f"event: progress\ndata: {json.dumps(state)}\n\n"
+                last = state
+            await asyncio.sleep(EXPORT_EVENT_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/exports/{job_id}/download")
+def download_export(job_id: str):
+    job = job_or_404(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+    try:
+        f = open(job["path"], "rb")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Unknown or expired export job")
+    headers = {"Content-Disposition": f"attachment; filename={job['filename']}", "Content-Length": str(os.fstat(f.fileno()).st_size)}
+    return StreamingResponse(exporter.iter_export(f), media_type=job["media_type"], headers=headers)
+
+@app.get("/strength")
+def get_strength():
+    return processor.strength_records()
+
+@app.post("/strength")
+async def upload_strength(file: UploadFile = File(...)):
+    # Reload the registered-strength roster without restarting the server
+    spooled = await spool([file])
+    try:
+        await run_in_threadpool(processor.load_strength_file, spooled[0][1], file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        ingest.discard(spooled)
+    return processor.strength_records()
+
+@app.delete("/strength")
+def reset_strength():
+    processor.load_strength()
+    return processor.strength_records()
 
 @app.get("/history")
-def get_history():
+def get_history(request: Request, response: Response):
+    # Reports are append-only, so the newest id and the count identify the list
+    etag = '"history-{}-{}"'.format(*database.get_reports_version())
+    cached = not_modified(request, etag)
+    if cached: return cached
+    response.headers.update({"ETag": etag, "Cache-Control": "no-cache"})
     return database.get_all_reports()
 
 @app.get("/history/{report_id}")
-def get_report_detail(report_id: int):
+def get_report_detail(report_id: int, request: Request, response: Response):
+    # Saved reports never change; the id and save time identify the rows
+    stamp = database.get_report_stamp(report_id)
+    if stamp is None: return []
+    etag = '"report-{}"'.format(hashlib.sha256(f"{report_id}:{stamp}".encode()).hexdigest()[:32])
+    cached = not_modified(request, etag)
+    if cached: return cached
+    response.headers.update({"ETag": etag, "Cache-Control": "no-cache"})
     return database.get_report_data(report_id)
@@ -1,6 +1,10 @@
 import pandas as pd
+import numpy as np
 import re
+import warnings
 from datetime import datetime
+from functools import lru_cache
+from pandas.tseries.api import guess_datetime_format
 
 # Column Mapping Definition
 RES_COL_MAP = {
@@ -26,9 +30,12 @@ YEAR_MAP = {
     'CITAR-III': 'CITAR-III'
 }
 
+DURATION_SENTINEL = 99999999
+_DURATION_MAX_LEN = 12
+
 def parse_duration_to_seconds(val):
     if pd.isna(val) or str(val).lower() in ['nan', 'n/a', '', 'none']:
-        return 99999999
+        return DURATION_SENTINEL
     val = str(val).strip()
     try:
         parts = list(map(int, val.split(':')))
@@ -37,15 +44,65 @@ def parse_duration_to_seconds(val):
         elif len(parts) == 2:
             return parts[0] * 60 + parts[1]
         else:
-            return 99999999
-    except:
-         return 99999999
+            return DURATION_SENTINEL
+    except ValueError:
+        return DURATION_SENTINEL
+
+def parse_durations(col):
+    """
+    Column-level parse_duration_to_seconds. Plain HH:MM:SS / MM:SS values are
+    decoded straight from their code points with NumPy; anything unusual
+    (blanks, signs, 'N/A', garbage) falls back to the scalar parser.
+    """
+    text = col.astype(str)
+    values = text.to_numpy(dtype=object)
+    lengths = text.str.len().fillna(0).to_numpy(dtype='int64')
+    result = np.full(len(values), DURATION_SENTINEL, dtype='int64')
+    ok = np.zeros(len(values), dtype=bool)
+
+    short = np.flatnonzero((lengths >= 3) & (lengths <= _DURATION_MAX_LEN))
+    if len(short):
+        n_chars = lengths[short]
+        width = int(n_chars.max())
+        chars = values[short].astype(f'U{width}')
+        # One row per character position so each step below is a contiguous scan
+        codes = np.ascontiguousarray(chars.view(np.uint32).reshape(len(chars), width).T).astype('int64')
+        is_digit = (codes >= 48) & (codes <= 57)
+        is_colon = codes == 58
+        colons = is_colon.sum(axis=0)
+        last = codes[n_chars - 1, np.arange(len(chars))]
+        valid = (
+            (is_digit | is_colon | (codes == 0)).all(axis=0)
+            & ((colons == 1) | (colons == 2))
+            & ~is_colon[0] & (last != 58)
+            & ~(is_colon[1:] & is_colon[:-1]).any(axis=0)
+        )
+        digits = np.where(is_digit, codes - 48, 0)
+        acc = np.zeros(len(chars), dtype='int64')
+        total = np.zeros(len(chars), dtype='int64')
+        for j in range(width):
+            acc = np.where(is_digit[j], acc * 10 + digits[j], acc)
+            total = np.where(is_colon[j], total * 60 + acc, total)
+            acc = np.where(is_colon[j], 0, acc)
+        result[short[valid]] = (total * 60 + acc)[valid]
+        ok[short[valid]] = True
+
+    rest = np.flatnonzero(~ok)
+    if len(rest):
+        leftovers = col.iloc[rest]
+        codes, uniques = pd.factorize(leftovers, use_na_sentinel=False)
+        parsed = np.array([parse_duration_to_seconds(v) for v in uniques], dtype='int64')
+        result[rest] = parsed[codes]
+    return pd.Series(result, index=col.index, name=col.name)
+
+DATE_PATTERN = re.compile(r'(\d{1,4}[-/][a-zA-Z0-9]{2,10}[-/]\d{1,4})')
+MISSING_TOKENS = ['nan', 'n/a', '', 'none']
 
 def extract_date_from_val(val):
-    if pd.isna(val) or str(val).lower() in ['nan', 'n/a', '', 'none']:
+    if pd.isna(val) or str(val).lower() in MISSING_TOKENS:
         return None
     val = str(val)
-    match = re.search(r'(\d{1,4}[-/][a-zA-Z0-9]{2,10}[-/]\d{1,4})', val)
+    match = DATE_PATTERN.search(val)
     if match:
         date_part = match.group(1)
         dt_obj = pd.to_datetime(date_part, errors='coerce')
@@ -56,6 +113,114 @@ def extract_date_from_val(val):
         return dt_obj.strftime("%d-%m-%Y")
     return None
 
+def _parse_one_date(text):
+    # The per-value parse extract_date_from_val has always used
+    dt_obj = pd.to_datetime(text, errors='coerce')
+    return dt_obj.strftime("%d-%m-%Y") if pd.notnull(dt_obj) else None
+
+# Formats whose numeric fields run together, like %Y%m%d; only fully padded
+# values read the same way on their own ("2025421" is no date per value)
+_NUMERIC_DIRECTIVES = re.compile(r'%[YymdHMS]')
+_ADJACENT_FIELDS = re.compile(r'%[YymdHMS]%[YymdHMS]')
+
+def _padded_width(fmt):
+    if not _ADJACENT_FIELDS.search(fmt) or '%' in _NUMERIC_DIRECTIVES.sub('', fmt):
+        return None
+    return len(datetime(2000, 1, 1).strftime(fmt))
+
+def _parse_date_texts(texts, formats):
+    """
+    Parse distinct date strings to "%d-%m-%Y" (None when unparseable), giving
+    the same result as parsing each one on its own. `formats` is the per-file
+    cache of formats that already matched; it is tried first and extended with
+    every newly guessed format that works. A day/month-ambiguous value (both
+    parts 12 or less) is never taken from a cached format, because on its own
+    it may be read the other way round; it goes through the per-value parse.
+    Neither is a value shorter than a run-together format's padded width.
+    """
+    parsed = {}
+    pending = pd.Series(list(dict.fromkeys(texts)), dtype=object)
+
+    def apply_format(fmt):
+        nonlocal pending
+        pending = pending[~pending.isin(list(parsed))]
+        try:
+            hits = pd.to_datetime(pending, format=fmt, errors='coerce')
+        except (ValueError, TypeError):
+            return False
+        found = hits.notna()
+        width = _padded_width(fmt)
+        if width is not None:
+            found &= pending.str.len() == width
+        ambiguous = found & (hits.dt.day <= 12) & (hits.dt.day != hits.dt.month) if '%d' in fmt and '%m' in fmt else None
+        for text, dt_obj in zip(pending[found], hits[found]):
+            parsed[text] = dt_obj.strftime("%d-%m-%Y")
+        if ambiguous is not None:
+            for text in pending[ambiguous]:
+                parsed[text] = _parse_one_date(text)
+        pending = pending[~found]
+        return found.any()
+
+    # Ambiguous values like 05/03/2025 make the guesser and the per-value
+    # parse warn about dayfirst on every file; the results are what we want
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        for fmt in formats:
+            if pending.empty: break
+            apply_format(fmt)
+
+        # Each format is tried once; a newly guessed one may settle many of
+        # the remaining texts at once
+        tried = set(formats)
+        for text in list(pending):
+            if text in parsed: continue
+            fmt = guess_datetime_format(text)
+            if fmt and fmt not in tried:
+                tried.add(fmt)
+                if apply_format(fmt): formats.append(fmt)
+            if text not in parsed:
+                parsed[text] = _parse_one_date(text)
+    return parsed
+
+def extract_dates(col, formats=None):
+    """
+    Batch extract_date_from_val for one file's column. Only distinct values
+    are inspected: one vectorized regex pass pulls out the date substrings
+    and each distinct substring is parsed once.
+    """
+    if formats is None: formats = []
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.dt.strftime("%d-%m-%Y").astype(object).where(col.notna(), None)
+
+    codes, uniques = pd.factorize(col)
+    texts = pd.Series([str(v) for v in uniques], dtype=object)
+    usable = ~texts.str.lower().isin(MISSING_TOKENS)
+    candidates = texts.str.extract(DATE_PATTERN, expand=False)
+
+    from_part = _parse_date_texts(candidates[usable & candidates.notna()], formats)
+    dates = [from_part.get(c) if ok and isinstance(c, str) else None for c, ok in zip(candidates, usable)]
+    retry = [i for i, d in enumerate(dates) if d is None and usable[i]]
+    if retry:
+        from_full = _parse_date_texts(texts[retry], formats)
+        for i in retry:
+            dates[i] = from_full[texts[i]]
+
+    mapped = np.array(dates + [None], dtype=object)
+    return pd.Series(mapped[codes], index=col.index, name=col.name, dtype=object)
+
+def derive_dates(df, formats=None):
+    """
+    Derived date per row, keeping a separate format cache for each source file.
+    Pass a dict as `formats` to keep those caches across chunks of the same files.
+    """
+    if formats is None: formats = {}
+    if 'Source_Filename' not in df.columns:
+        return extract_dates(df['Timestamp'], formats.setdefault(None, []))
+    out = np.empty(len(df), dtype=object)
+    for name, positions in df.groupby('Source_Filename', sort=False, dropna=False).indices.items():
+        out[positions] = extract_dates(df['Timestamp'].iloc[positions], formats.setdefault(name, [])).to_numpy()
+    return pd.Series(out, index=df.index, dtype=object)
+
 def normalize_branch(name):
     name = str(name).upper().strip()
     # Replace common separators with space for word boundary matching
@@ -100,6 +265,13 @@ def normalize_branch(name):
     if 'AGRICULT' in name_full: return 'ACT'
     return name
 
+_ROMAN_II = re.compile(r'\bII\b')
+_ROMAN_III = re.compile(r'\bIII\b')
+_ROMAN_I = re.compile(r'\bI\b')
+_ROMAN_IV = re.compile(r'\bIV\b')
+_DIGITS = re.compile(r'\d+')
+_FLOAT_SUFFIX = re.compile(r'\.0$')
+
 def normalize_year_val(val):
     val = str(val).upper().strip()
     if val in YEAR_MAP: return YEAR_MAP[val]
@@ -111,11 +283,11 @@ def normalize_year_val(val):
     if '2027' in val: return 'III'
     if 'CITAR' in val: return 'CITAR-III'
     
-    if re.search(r'\bII\b', val): return 'II'
-    if re.search(r'\bIII\b', val): return 'III'
-    if re.search(r'\bI\b', val): return 'I'
-    if re.search(r'\bIV\b', val): return 'IV'
-    digits = re.findall(r'\d+', val)
+    if _ROMAN_II.search(val): return 'II'
+    if _ROMAN_III.search(val): return 'III'
+    if _ROMAN_I.search(val): return 'I'
+    if _ROMAN_IV.search(val): return 'IV'
+    digits = _DIGITS.findall(val)
     if digits:
         for d in digits:
             if d == '1': return 'I'
@@ -124,29 +296,117 @@ def normalize_year_val(val):
             if d == '4': return 'IV'
     return val
 
-def standardize_columns(df):
-    df.columns = df.columns.str.strip()
-    for standard, variations in RES_COL_MAP.items():
-        candidates = []
-        for col in df.columns:
-            if col.lower() in variations or col.lower() == standard.lower():
-                candidates.append(col)
-        if not candidates: continue
-        best_col = candidates[0]
-        if len(candidates) > 1:
-            best_col = max(candidates, key=lambda c: df[c].count())
-        if best_col != standard:
-             df.rename(columns={best_col: standard}, inplace=True)
-        other_candidates = [c for c in candidates if c != best_col and c in df.columns]
-        if other_candidates:
-            df.drop(columns=other_candidates, inplace=True)
-    if 'Reg No' not in df.columns:
-        col_map = {c.lower().strip(): c for c in df.columns}
-        for norm_col, orig_col in col_map.items():
-            if 'reg' in norm_col and 'no' in norm_col:
-                df.rename(columns={orig_col: 'Reg No'}, inplace=True)
+# Process-wide raw -> canonical tables shared by every request
+NORMALIZE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def _canonical_branch(raw):
+    return normalize_branch(raw)
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE, typed=True)
+def _canonical_year(raw):
+    # Same as .astype(str).replace(r'\.0$', '', regex=True) before normalizing
+    return normalize_year_val(_FLOAT_SUFFIX.sub('', str(raw)))
+
+def _normalize_categories(col, lookup):
+    """Normalize only the distinct values of `col`; returns a categorical column."""
+    cat = col.astype('category')
+    canon = [lookup(v) for v in cat.cat.categories]
+    codes = cat.cat.codes.to_numpy()
+    if (codes == -1).any():
+        canon.append(lookup(np.nan))
+        codes = np.where(codes == -1, len(canon) - 1, codes)
+    canon_codes, canon_values = pd.factorize(pd.Index(canon, dtype=object))
+    normalized = pd.Categorical.from_codes(canon_codes[codes], canon_values)
+    return pd.Series(normalized, index=col.index, name=col.name)
+
+def normalize_branch_column(col):
+    return _normalize_categories(col, _canonical_branch)
+
+def normalize_year_column(col):
+    return _normalize_categories(col, _canonical_year)
+
+# Read-time dtypes for the standard columns that need one, and the integer count columns.
+# Reg No keeps the type the reader infers: numeric registration numbers stay ints
+# in reports and history, as they always have
+RES_COL_DTYPES = {'Branch': 'category', 'Year': 'category'}
+COUNT_COLUMNS = ['Solved count', 'Total submissions']
+
+# Lower-case alias -> standard name, precompiled from RES_COL_MAP (earlier entries win)
+RES_ALIAS_LOOKUP = {}
+for _standard, _variations in RES_COL_MAP.items():
+    for _alias in _variations + [_standard.lower()]:
+        RES_ALIAS_LOOKUP.setdefault(_alias, _standard)
+
+HEADER_CACHE_SIZE = 256
+
+def _is_reg_no_fallback(name):
+    name = name.lower()
+    return 'reg' in name and 'no' in name
+
+def match_result_columns(headers):
+    """
+    For each raw header, the standard name standardize_columns could give it,
+    or None if the analysis never uses it. Headers containing both 'reg' and
+    'no' are kept as candidates for the Reg No fallback.
+    """
+    matches = []
+    for header in headers:
+        name = str(header).strip()
+        standard = RES_ALIAS_LOOKUP.get(name.lower())
+        if standard is None and _is_reg_no_fallback(name):
+            standard = 'Reg No'
+        matches.append(standard)
+    return matches
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def resolve_headers(headers):
+    """
+    Resolve one header layout: the stripped names, and for each standard name
+    the positions of the columns that could supply it. Cached per layout, since
+    the same exports come in every day.
+    """
+    names = tuple(str(h).strip() for h in headers)
+    candidates = {}
+    for pos, name in enumerate(names):
+        standard = RES_ALIAS_LOOKUP.get(name.lower())
+        if standard is not None:
+            candidates.setdefault(standard, []).append(pos)
+    # Fallback for Reg No specifically if missed - GREEDY SEARCH
+    if 'Reg No' not in candidates:
+        claimed = {pos for positions in candidates.values() for pos in positions}
+        for pos, name in enumerate(names):
+            if pos not in claimed and _is_reg_no_fallback(name):
+                candidates['Reg No'] = [pos]
                 break
+    return names, tuple((standard, tuple(positions)) for standard, positions in candidates.items())
+
+def column_plan(df):
+    """
+    (positions, names) of the columns standardize_columns keeps. Only a
+    standard name with several candidate columns looks at the data: the one
+    with the most non-null values wins and the others are dropped.
+    """
+    names, candidates = resolve_headers(tuple(df.columns))
+    targets = dict(enumerate(names))
+    for standard, positions in candidates:
+        best = positions[0]
+        if len(positions) > 1:
+            best = max(positions, key=lambda pos: df.iloc[:, pos].count())
+        for pos in positions:
+            del targets[pos]
+        targets[best] = standard
+    positions = sorted(targets)
+    return positions, [targets[pos] for pos in positions]
+
+def standardize_columns(df):
+    positions, names = column_plan(df)
+    # One positional select + relabel, so a renamed column can never collide
+    # with (and be dropped alongside) another column of the same name
+    df = df.iloc[:, positions]
+    df.columns = names
     return df
+
 # --- STATIC DATA (HARDCODED) ---
 STATIC_STRENGTH = [
     # Second Year (II)
@@ -188,12 +448,74 @@ STATIC_STRENGTH = [
     {"Branch": "ECE", "Year": "CITAR-III", "Registered_Count": 64}
 ]
 
-REGISTERED_COUNTS_DF = pd.DataFrame(STATIC_STRENGTH)
+STRENGTH_COL_MAP = {
+    'Branch': RES_COL_MAP['Branch'],
+    'Year': RES_COL_MAP['Year'],
+    'Registered_Count': ['registered_count', 'registered count', 'registered', 'no of registered students', 'strength', 'student strength', 'count', 'total students']
+}
+
+# (Branch, Year) -> registered strength; swapped wholesale on reload
+STRENGTH_INDEX = {}
 
-def generate_daily_reports(df_res):
-    # Standardize columns has already been called in main.py
-    df_res['Branch'] = df_res['Branch'].ffill()
-    df_res['Year'] = df_res['Year'].ffill()
+def build_strength_index(roster):
+    """
+    Index a roster frame by (Branch, Year). Rows are summed per key when a
+    count column is present, otherwise each row counts as one student.
+    """
+    lookup = {}
+    for col in roster.columns:
+        key = str(col).strip().lower()
+        for standard, variations in STRENGTH_COL_MAP.items():
+            if standard not in lookup.values() and (key in variations or key == standard.lower()):
+                lookup[col] = standard
+    roster = roster.rename(columns=lookup)
+    missing = [c for c in ['Branch', 'Year'] if c not in roster.columns]
+    if missing:
+        raise ValueError(f"Roster missing columns: {missing}")
+
+    roster = roster.dropna(subset=['Branch', 'Year'])
+    branches = normalize_branch_column(roster['Branch']).astype(str)
+    years = normalize_year_column(roster['Year']).astype(str)
+    if 'Registered_Count' in roster.columns:
+        counts = pd.to_numeric(roster['Registered_Count'], errors='coerce').fillna(0).astype(int)
+    else:
+        counts = pd.Series(1, index=roster.index)
+    totals = counts.groupby([branches, years]).sum()
+    return {key: int(val) for key, val in totals.items()}
+
+def load_strength(roster=None):
+    """Replace the live strength index; with no roster, fall back to STATIC_STRENGTH."""
+    global STRENGTH_INDEX
+    if roster is None:
+        roster = pd.DataFrame(STATIC_STRENGTH)
+    STRENGTH_INDEX = build_strength_index(roster)
+    return STRENGTH_INDEX
+
+def load_strength_file(path_or_buffer, filename):
+    """Load a roster CSV/workbook; any file that cannot be read raises ValueError."""
+    try:
+        roster = pd.read_csv(path_or_buffer) if (filename or '').endswith('.csv') else pd.read_excel(path_or_buffer)
+    except Exception as e:
+        raise ValueError(f"Could not read roster file {filename!r}: {e}")
+    return load_strength(roster)
+
+def strength_records():
+    return [{"Branch": b, "Year": y, "Registered_Count": c} for (b, y), c in sorted(STRENGTH_INDEX.items())]
+
+load_strength()
+
+REPORT_COUNT_COLUMNS = [
+    "No of Registered Students", "No of Students Appeared", "No of Students Absent",
+    "Zero Problems Solved", "One Problem Solved", "Two Problems Solved", "Three Problems Solved"
+]
+SOLVED_BUCKET_COLUMNS = ["Zero Problems Solved", "One Problem Solved", "Two Problems Solved", "Three Problems Solved"]
+YEAR_SORT_MAP = {"I": 1, "II": 2, "III": 3, "CITAR-III": 4, "IV": 5}
+
+def prepare_daily_frame(df_res, formats=None):
+    """Clean Branch/Year, apply the CITAR rules and attach Derived_Date (in place)."""
+    # Uploads arrive with categorical Branch/Year; fill on plain values
+    df_res['Branch'] = df_res['Branch'].astype(object).ffill()
+    df_res['Year'] = df_res['Year'].astype(object).ffill()
     df_res['Branch'] = df_res['Branch'].fillna('Unknown').astype(str).str.strip().str.upper()
     df_res['Year'] = df_res['Year'].fillna('Unknown').astype(str).str.strip().str.upper()
 
@@ -204,85 +526,95 @@ def generate_daily_reports(df_res):
         df_res.loc[mask_reg, 'Year'] = 'CITAR-III'
 
     if 'Timestamp' in df_res.columns:
-        df_res['Derived_Date'] = df_res['Timestamp'].apply(extract_date_from_val)
+        df_res['Derived_Date'] = derive_dates(df_res, formats)
     else:
         df_res['Derived_Date'] = "Not Detected"
-    
     df_res['Derived_Date'] = df_res['Derived_Date'].fillna("Not Detected")
-    unique_dates = df_res['Derived_Date'].unique()
-    
+
+    df_res['Branch'] = normalize_branch_column(df_res['Branch'])
+    df_res['Year'] = normalize_year_column(df_res['Year'])
+    return df_res
+
+def count_daily_buckets(df):
+    """
+    Appeared and 0/1/2/3+ solved counts per (date, branch, year) in one pass.
+    Groups keep the order in which their date first appears.
+    """
+    solved = pd.to_numeric(df['Solved count'], errors='coerce').fillna(0).astype(int).to_numpy()
+    # Bucket 4 collects negative counts: they appeared but land in no solved column
+    bucket = np.where(solved < 0, 4, np.minimum(solved, 3))
+    grouper = df.groupby(['Derived_Date', 'Branch', 'Year'], sort=False, observed=True)
+    group_ids = grouper.ngroup().to_numpy()
+    table = np.bincount(group_ids * 5 + bucket, minlength=grouper.ngroups * 5).reshape(grouper.ngroups, 5)
+
+    counts = pd.DataFrame(table[:, :4], columns=SOLVED_BUCKET_COLUMNS, index=grouper.size().index)
+    counts.insert(0, "No of Students Appeared", table.sum(axis=1))
+    counts.index.names = ['Derived_Date', 'Branch', 'Year']
+    return counts
+
+def merge_daily_counts(counts, more):
+    """Add the counts of a later chunk; groups stay in first-appearance order."""
+    if counts is None:
+        return more
+    merged = pd.concat([counts, more])
+    return merged.groupby(level=['Derived_Date', 'Branch', 'Year'], sort=False, observed=True).sum()
+
+def build_daily_reports(counts):
+    """Turn per-(date, branch, year) counts into the per-date report payloads."""
+    if counts is None or counts.empty:
+        return []
+    rows = counts.reset_index()
+    rows['Branch'] = rows['Branch'].astype(str)
+    rows['Year'] = rows['Year'].astype(str)
+    strength = STRENGTH_INDEX
+    rows["No of Registered Students"] = [strength.get(key, 0) for key in zip(rows['Branch'], rows['Year'])]
+    rows["No of Students Absent"] = (rows["No of Registered Students"] - rows["No of Students Appeared"]).clip(lower=0)
+    rows['Year_Sort'] = rows['Year'].map(YEAR_SORT_MAP).fillna(99).astype(int)
+
+    date_order = {d: i for i, d in enumerate(rows['Derived_Date'].unique())}
+    rows['Date_Order'] = rows['Derived_Date'].map(date_order)
+    rows = rows.sort_values(['Date_Order', 'Branch', 'Year_Sort', 'Year'], kind='stable')
+
+    branch_totals = rows.groupby(['Date_Order', 'Branch'])[REPORT_COUNT_COLUMNS].sum()
+    branch_sizes = rows.groupby(['Date_Order', 'Branch']).size()
+    grand_totals = rows.groupby('Date_Order')[REPORT_COUNT_COLUMNS].sum()
+    row_columns = ["Branch", "Year"] + REPORT_COUNT_COLUMNS + ["Year_Sort"]
+
     final_reports = []
-    year_sort_map = {"I": 1, "II": 2, "III": 3, "CITAR-III": 4, "IV": 5}
-
-    for d_str in unique_dates:
-        df_date = df_res[df_res['Derived_Date'] == d_str].copy()
-        df_date['Branch'] = df_date['Branch'].apply(normalize_branch)
-        df_date['Year'] = df_date['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
-        df_date['Solved count'] = pd.to_numeric(df_date['Solved count'], errors='coerce').fillna(0).astype(int)
-        
-        raw_rows = []
-        for (branch, year), group in df_date.groupby(['Branch', 'Year']):
-            reg = REGISTERED_COUNTS_DF[(REGISTERED_COUNTS_DF['Branch'] == branch) & (REGISTERED_COUNTS_DF['Year'] == year)]
-            reg_val = int(reg.iloc[0]['Registered_Count']) if not reg.empty else 0
-            absent = max(0, reg_val - len(group))
-            raw_rows.append({
-                "Branch": branch, "Year": year, 
-                "No of Registered Students": reg_val, 
-                "No of Students Appeared": len(group),
-                "No of Students Absent": absent,
-                "Zero Problems Solved": len(group[group['Solved count'] == 0]),
-                "One Problem Solved": len(group[group['Solved count'] == 1]),
-                "Two Problems Solved": len(group[group['Solved count'] == 2]),
-                "Three Problems Solved": len(group[group['Solved count'] >= 3])
-            })
-        
-        if not raw_rows: continue
-        
-        # Build final report DF with totals
-        df_temp = pd.DataFrame(raw_rows)
+    for (order, d_str), date_rows in rows.groupby(['Date_Order', 'Derived_Date'], sort=True):
         final_rows = []
-        grand_total = {"Branch": "OVERALL TOTAL", "Year": "", "No of Registered Students": 0, "No of Students Appeared": 0, "No of Students Absent": 0, "Zero Problems Solved": 0, "One Problem Solved": 0, "Two Problems Solved": 0, "Three Problems Solved": 0}
-        
-        for branch in sorted(df_temp['Branch'].unique()):
-            b_df = df_temp[df_temp['Branch'] == branch].copy()
-            b_df['Year_Sort'] = b_df['Year'].map(lambda x: year_sort_map.get(x, 99))
-            b_df = b_df.sort_values('Year_Sort')
-            
-            for _, r in b_df.iterrows():
-                final_rows.append(r.to_dict())
-                for k in grand_total.keys():
-                    if k not in ["Branch", "Year"]: grand_total[k] += r[k]
-            
-            if len(b_df) > 1:
-                final_rows.append({
-                    "Branch": f"{branch} TOTAL", "Year": "", 
-                    "No of Registered Students": int(b_df['No of Registered Students'].sum()),
-                    "No of Students Appeared": int(b_df['No of Students Appeared'].sum()),
-                    "No of Students Absent": int(b_df['No of Students Absent'].sum()),
-                    "Zero Problems Solved": int(b_df['Zero Problems Solved'].sum()),
-                    "One Problem Solved": int(b_df['One Problem Solved'].sum()),
-                    "Two Problems Solved": int(b_df['Two Problems Solved'].sum()),
-                    "Three Problems Solved": int(b_df['Three Problems Solved'].sum())
-                })
-        
+        records = date_rows[row_columns].to_dict('records')
+        for i, row in enumerate(records):
+            final_rows.append(row)
+            branch = row['Branch']
+            is_last = i == len(records) - 1 or records[i + 1]['Branch'] != branch
+            if is_last and branch_sizes[(order, branch)] > 1:
+                subtotal = {"Branch": f"{branch} TOTAL", "Year": ""}
+                subtotal.update({k: int(v) for k, v in branch_totals.loc[(order, branch)].items()})
+                final_rows.append(subtotal)
+        grand_total = {"Branch": "OVERALL TOTAL", "Year": ""}
+        grand_total.update({k: int(v) for k, v in grand_totals.loc[order].items()})
         final_rows.append(grand_total)
-        u_yrs = sorted(list(set(df_temp['Year'])))
         final_reports.append({
-            "date": d_str, 
-            "data": final_rows, 
-            "years_text": ", ".join(u_yrs)
+            "date": d_str,
+            "data": final_rows,
+            "years_text": ", ".join(sorted(set(date_rows['Year'])))
         })
-
     return final_reports
 
-def generate_weekly_report(df_res):
+def generate_daily_reports(df_res):
+    # Standardize columns has already been called in main.py
+    prepare_daily_frame(df_res)
+    return build_daily_reports(count_daily_buckets(df_res))
+
+def prepare_weekly_frame(df_res, formats=None):
     df_weekly = df_res.copy()
-    df_weekly['Branch'] = df_weekly['Branch'].apply(normalize_branch)
-    df_weekly['Year'] = df_weekly['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
+    df_weekly['Branch'] = normalize_branch_column(df_weekly['Branch'])
+    df_weekly['Year'] = normalize_year_column(df_weekly['Year'])
     df_weekly['Solved count'] = pd.to_numeric(df_weekly['Solved count'], errors='coerce').fillna(0).astype(int)
     
     if 'Timestamp' in df_weekly.columns:
-        df_weekly['Derived_Date'] = df_weekly['Timestamp'].apply(extract_date_from_val)
+        df_weekly['Derived_Date'] = derive_dates(df_weekly, formats)
     else:
         df_weekly['Derived_Date'] = "Unknown"
     
@@ -291,21 +623,35 @@ def generate_weekly_report(df_res):
     if 'Active utilisation' not in df_weekly.columns:
         df_weekly['Active utilisation'] = '00:00:00'
     
-    df_weekly['Active_Secs_Agg'] = df_weekly['Active utilisation'].apply(parse_duration_to_seconds).replace(99999999, 0)
-    
-    has_reg = 'Reg No' in df_weekly.columns
-    id_col = 'Reg No' if has_reg else 'Name'
+    df_weekly['Active_Secs_Agg'] = parse_durations(df_weekly['Active utilisation']).replace(DURATION_SENTINEL, 0)
+    return df_weekly
 
-    # Student-Day Level
-    daily_student = df_weekly.groupby([id_col, 'Derived_Date']).agg({
+def _student_day_spec(has_reg):
+    return {
         'Solved count': 'max',
         'Total submissions': 'max',
         'Active_Secs_Agg': 'max',
         'Branch': 'first',
         'Year': 'first',
         'Name': 'first' if has_reg else 'last'
-    }).reset_index()
-    
+    }
+
+def aggregate_student_days(df_weekly, has_reg):
+    # Student-Day Level
+    id_col = 'Reg No' if has_reg else 'Name'
+    return df_weekly.groupby([id_col, 'Derived_Date']).agg(_student_day_spec(has_reg)).reset_index()
+
+def merge_student_days(daily_student, more, has_reg):
+    """Fold a later chunk's student-day rows in; max/first/last are all re-aggregable."""
+    if daily_student is None:
+        return more
+    id_col = 'Reg No' if has_reg else 'Name'
+    merged = pd.concat([daily_student, more], ignore_index=True)
+    return merged.groupby([id_col, 'Derived_Date']).agg(_student_day_spec(has_reg)).reset_index()
+
+def build_weekly_report(daily_student, has_reg):
+    id_col = 'Reg No' if has_reg else 'Name'
+
     # Weekly Aggregation
     weekly_grouped = daily_student.groupby(id_col).agg({
         'Derived_Date': 'nunique',
@@ -327,6 +673,138 @@ def generate_weekly_report(df_res):
 
     return sorted_weekly.to_dict('records')
 
+def student_day_rows(daily_student):
+    """
+    aggregate_student_days output (keyed by Reg No) as rows for the persisted
+    student-day table: ISO days, undated rows dropped.
+    """
+    day = pd.to_datetime(daily_student['Derived_Date'], format='%d-%m-%Y', errors='coerce')
+    keep = (day.notna() & daily_student['Reg No'].notna()).to_numpy()
+    rows = daily_student[keep]
+    return pd.DataFrame({
+        'reg_no': rows['Reg No'].astype(str).to_numpy(),
+        'day': day[keep].dt.strftime('%Y-%m-%d').to_numpy(),
+        'solved': rows['Solved count'].to_numpy(),
+        'submissions': rows['Total submissions'].to_numpy(),
+        'active_secs': rows['Active_Secs_Agg'].to_numpy(),
+        'branch': rows['Branch'].astype(object).to_numpy(),
+        'year': rows['Year'].astype(object).to_numpy(),
+        'name': rows['Name'].astype(object).to_numpy(),
+    })
+
+def daily_student_days(df_res):
+    """
+    aggregate_student_days for a frame prepare_daily_frame has already
+    cleaned, reusing its dates and branch/year instead of preparing a weekly
+    copy. Undated rows are skipped. None when the upload has no Reg No or
+    Name column to build student rows from.
+    """
+    if 'Reg No' not in df_res.columns or 'Name' not in df_res.columns:
+        return None
+    dated = df_res[(df_res['Derived_Date'] != "Not Detected").to_numpy()]
+    if 'Active utilisation' in dated.columns:
+        active_secs = parse_durations(dated['Active utilisation']).replace(DURATION_SENTINEL, 0)
+    else:
+        active_secs = 0
+    days = pd.DataFrame({
+        'Reg No': dated['Reg No'],
+        'Derived_Date': dated['Derived_Date'],
+        'Solved count': pd.to_numeric(dated['Solved count'], errors='coerce').fillna(0).astype(int),
+        'Total submissions': dated['Total submissions'] if 'Total submissions' in dated.columns else 0,
+        'Active_Secs_Agg': active_secs,
+        'Branch': dated['Branch'],
+        'Year': dated['Year'],
+        'Name': dated['Name'],
+    }, index=dated.index)
+    return aggregate_student_days(days, True)
+
+def build_stored_leaderboard(totals):
+    """Per-student window totals from the database in generate_weekly_report's record layout."""
+    weekly = totals.copy()
+    weekly.columns = ['Reg No', 'Days Appeared', 'Total Solved', 'Total Submissions', 'Active_Secs_Total', 'Branch', 'Year', 'Name']
+    weekly = weekly.sort_values(by=['Total Solved', 'Total Submissions'], ascending=[False, True], kind='stable').reset_index(drop=True)
+    return weekly.to_dict('records')
+
+def generate_weekly_report(df_res):
+    df_weekly = prepare_weekly_frame(df_res)
+    has_reg = 'Reg No' in df_weekly.columns
+    return build_weekly_report(aggregate_student_days(df_weekly, has_reg), has_reg)
+
+# --- TOP-N RANKING ---
+RANK_ASCENDING = [False, True, True]
+
+def _dense_ranks(values, ascending):
+    """Dense rank of each value in sort order; NaN ranks last, as with na_position='last'."""
+    codes, uniques = pd.factorize(values, sort=True)
+    k = len(uniques)
+    ranks = codes if ascending else k - 1 - codes
+    return np.where(codes < 0, k, ranks).astype('int64'), k + 1
+
+def _rank_key(keys, ascending):
+    """
+    One int64 per row ordering rows exactly like a multi-key sort (ties
+    included), or None if the mixed-radix key would overflow.
+    """
+    composite = np.zeros(len(keys[0]), dtype='int64')
+    span = 1
+    for values, asc in zip(keys, ascending):
+        ranks, radix = _dense_ranks(values, asc)
+        span *= radix
+        if span >= 2 ** 62:
+            return None
+        composite = composite * radix + ranks
+    return composite
+
+def _head_count(n, top_n):
+    # Same row count as DataFrame.head(top_n), including negative top_n
+    return max(n + top_n, 0) if top_n < 0 else min(top_n, n)
+
+def rank_top_n(keys, ascending, top_n):
+    """
+    Positions of the rows DataFrame.sort_values(keys, ascending).head(top_n)
+    would return, in that order. Only the selected rows are sorted: an
+    argpartition finds the cut-off key, every row tied on it is kept, and a
+    stable sort of that small set settles ties by original position.
+    """
+    n = len(keys[0])
+    take = _head_count(n, top_n)
+    composite = _rank_key(keys, ascending)
+    if composite is None:
+        order = np.lexsort([_dense_ranks(values, asc)[0] for values, asc in zip(reversed(keys), reversed(ascending))])
+        return order[:take]
+    if take == 0:
+        return np.empty(0, dtype='int64')
+    if take < n:
+        cutoff = composite[np.argpartition(composite, take - 1)[take - 1]]
+        candidates = np.flatnonzero(composite <= cutoff)
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(composite[candidates], kind='stable')
+    return candidates[order[:take]]
+
+def rank_top_n_grouped(groups, keys, ascending, top_n):
+    """
+    rank_top_n for every group in one pass: {group: positions}, groups in
+    sorted order. Rows with a missing group are left out.
+    """
+    codes, uniques = pd.factorize(groups, sort=True)
+    composite = _rank_key(keys, ascending)
+    if composite is None:
+        sort_keys = [_dense_ranks(values, asc)[0] for values, asc in zip(reversed(keys), reversed(ascending))]
+    else:
+        sort_keys = [composite]
+    # lexsort is stable, so ties inside a group keep their original order
+    order = np.lexsort(sort_keys + [codes])
+    order = order[codes[order] >= 0]
+    sizes = np.bincount(codes[order], minlength=len(uniques))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    result = {}
+    for g, group in enumerate(uniques):
+        take = _head_count(sizes[g], top_n)
+        result[group] = order[starts[g]:starts[g] + take]
+    return result
+
 def get_top_performers(df, top_n=50):
     """
     Unified ranking logic for the API.
@@ -335,35 +813,74 @@ def get_top_performers(df, top_n=50):
         return []
     
     # Sort: Solved (Desc), Active Util (Asc), Submissions (Asc)
-    # Note: We need to ensure columns are standardized and durations are parsed
-    df_calc = df.copy()
-    
-    # Ensure columns exist or map from alternatives
-    if 'Solved count' not in df_calc.columns and 'Total Solved' in df_calc.columns:
-        df_calc['Solved count'] = df_calc['Total Solved']
-    
-    if 'Total submissions' not in df_calc.columns and 'Total Submissions' in df_calc.columns:
-        df_calc['Total submissions'] = df_calc['Total Submissions']
+    # Keys are built as standalone columns; only the top rows are copied
+    if 'Solved count' in df.columns: solved = df['Solved count']
+    elif 'Total Solved' in df.columns: solved = df['Total Solved']
+    else: solved = pd.Series(0, index=df.index)
 
-    # Default to 0 if still missing
-    if 'Solved count' not in df_calc.columns: df_calc['Solved count'] = 0
-    if 'Total submissions' not in df_calc.columns: df_calc['Total submissions'] = 0
+    if 'Total submissions' in df.columns: submissions = df['Total submissions']
+    elif 'Total Submissions' in df.columns: submissions = df['Total Submissions']
+    else: submissions = pd.Series(0, index=df.index)
 
-    # Ensure numeric
-    df_calc['Solved count'] = pd.to_numeric(df_calc['Solved count'], errors='coerce').fillna(0)
-    df_calc['Total submissions'] = pd.to_numeric(df_calc['Total submissions'], errors='coerce').fillna(0)
+    solved = pd.to_numeric(solved, errors='coerce').fillna(0)
+    submissions = pd.to_numeric(submissions, errors='coerce').fillna(0)
     
     # Parse duration
-    if 'Active utilisation' in df_calc.columns:
-        df_calc['Active_Secs'] = df_calc['Active utilisation'].apply(parse_duration_to_seconds)
-    elif 'Active_Secs_Total' in df_calc.columns:
-        df_calc['Active_Secs'] = df_calc['Active_Secs_Total']
+    if 'Active utilisation' in df.columns:
+        active_secs = parse_durations(df['Active utilisation'])
+    elif 'Active_Secs_Total' in df.columns:
+        active_secs = df['Active_Secs_Total']
     else:
-        df_calc['Active_Secs'] = 99999999
-        
-    ranked = df_calc.sort_values(
-        by=['Solved count', 'Active_Secs', 'Total submissions'],
-        ascending=[False, True, True]
-    ).head(top_n).reset_index(drop=True)
+        active_secs = pd.Series(DURATION_SENTINEL, index=df.index)
+
+    positions = rank_top_n([solved.to_numpy(), active_secs.to_numpy(), submissions.to_numpy()], RANK_ASCENDING, top_n)
+    ranked = df.iloc[positions].reset_index(drop=True)
+    ranked['Solved count'] = solved.to_numpy()[positions]
+    ranked['Total submissions'] = submissions.to_numpy()[positions]
+    ranked['Active_Secs'] = active_secs.to_numpy()[positions]
     
     return ranked.to_dict('records')
+
+def filter_branch(df, branch):
+    """
+    Rows of one standardized file whose normalized Branch is `branch`.
+    Normalization only looks at the file's distinct Branch values.
+    """
+    if 'Branch' not in df.columns:
+        return df.iloc[0:0]
+    return df[(normalize_branch_column(df['Branch']) == branch).to_numpy()]
+
+# --- LEADERBOARD INDEX ---
+def build_leaderboard(weekly_records, scope=None):
+    """
+    Rank a weekly report once for every view /performance can ask for: `rows`
+    in global order plus, per branch, year and (branch, year), the positions
+    of its rows in that order. Because the ranking sort is stable, a filtered
+    leaderboard is exactly the global one restricted to the filter. `scope`
+    names the single branch the records were restricted to, if any.
+    """
+    rows = get_top_performers(pd.DataFrame(weekly_records), len(weekly_records))
+    branches = pd.Series([r.get('Branch') for r in rows], dtype=object)
+    years = pd.Series([r.get('Year') for r in rows], dtype=object)
+    return {
+        "scope": scope,
+        "rows": rows,
+        "by_branch": branches.groupby(branches).indices,
+        "by_year": years.groupby(years).indices,
+        "by_branch_year": branches.groupby([branches, years]).indices,
+    }
+
+def leaderboard_slice(board, branch="OVERALL", year=None, top_n=50, offset=0):
+    """(total rows in the view, records offset..offset+top_n) for one branch/year view."""
+    branch = None if branch in (None, "", "OVERALL") else branch
+    year = None if year in (None, "", "ALL") else year
+    if branch is not None and year is not None:
+        positions = board["by_branch_year"].get((branch, year), [])
+    elif branch is not None:
+        positions = board["by_branch"].get(branch, [])
+    elif year is not None:
+        positions = board["by_year"].get(year, [])
+    else:
+        positions = range(len(board["rows"]))
+    window = positions[offset:offset + top_n] if top_n >= 0 else positions[offset:top_n]
+    return len(positions), [board["rows"][i] for i in window]
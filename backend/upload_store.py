@@ -0,0 +1,63 @@
+import os
+import re
+import pandas as pd
+
+# --- UPLOAD STORE CONFIG ---
+# Parsed + standardized uploads, keyed by the SHA-256 of the raw file bytes
+UPLOAD_DIR = os.environ.get("SKILLRACK_UPLOAD_DIR", os.path.join(os.path.dirname(__file__), "..", "upload_cache"))
+MAX_STORE_BYTES = int(os.environ.get("SKILLRACK_UPLOAD_CACHE_BYTES", 512 * 1024 * 1024))
+
+# Bump when parsing changes what a stored frame looks like; older entries
+# then read as misses and age out through eviction
+FORMAT_VERSION = 3
+
+_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def _path(upload_id):
+    if not _ID_RE.match(upload_id or ""):
+        raise ValueError(f"Invalid upload id: {upload_id}")
+    return os.path.join(UPLOAD_DIR, f"{upload_id}.v{FORMAT_VERSION}.pkl")
+
+def get(upload_id):
+    """Return the stored frame for `upload_id`, or None if it is not cached."""
+    path = _path(upload_id)
+    try:
+        df = pd.read_pickle(path)
+    except FileNotFoundError:
+        return None
+    # Touch so eviction sees this entry as recently used
+    os.utime(path)
+    return df
+
+def put(upload_id, df, filename):
+    """Persist a standardized frame; the first filename seen is kept in df.attrs."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = _path(upload_id)
+    df.attrs['source_filename'] = filename
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    evict()
+
+def evict(max_bytes=None):
+    """Drop least recently used entries until the store fits in max_bytes."""
+    max_bytes = MAX_STORE_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(UPLOAD_DIR):
+        return
+    entries = []
+    for name in os.listdir(UPLOAD_DIR):
+        if not name.endswith(".pkl"): continue
+        path = os.path.join(UPLOAD_DIR, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes: break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
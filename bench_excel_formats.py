@@ -0,0 +1,56 @@
+import sys
+import time
+import backend.exporter as exporter
+
+# A 30-date workbook with 10 departments x 4 years per sheet, rendered with
+# the shared per-workbook formats and with fresh formats for every sheet
+DATES = [f"{d:02d}-03-2024" for d in range(1, 31)]
+BRANCHES = ["CSE", "ECE", "EEE", "IT", "MECH", "CIVIL", "AIDS", "AIML", "CSBS", "BME"]
+YEARS = ["I", "II", "III", "IV"]
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+def report_rows():
+    rows = []
+    for b in BRANCHES:
+        for y in YEARS:
+            rows.append(dict(zip(exporter.REPORT_COL_KEYS, [b, y, 60, 55, 5, 10, 15, 15, 15])))
+        rows.append(dict(zip(exporter.REPORT_COL_KEYS, [f"{b} TOTAL", "", 240, 220, 20, 40, 60, 60, 60])))
+    rows.append(dict(zip(exporter.REPORT_COL_KEYS, ["OVERALL TOTAL", "", 2400, 2200, 200, 400, 600, 600, 600])))
+    return rows
+
+reports = [{"date": d, "data": report_rows(), "years_text": "I, II, III & IV"} for d in DATES]
+
+def per_sheet_formats(workbook):
+    return {name: workbook.add_format(props) for name, props in exporter.REPORT_STYLES.items()}
+
+# Format objects handed to the sheet writers in the current round
+created = set()
+
+def counting(formats_fn):
+    """Wrap a style-table function, counting each Format it hands out once."""
+    def wrapper(workbook):
+        formats = formats_fn(workbook)
+        created.update(id(f) for f in formats.values())
+        return formats
+    return wrapper
+
+def bench(label):
+    best = None
+    for _ in range(ROUNDS):
+        created.clear()
+        start = time.perf_counter()
+        data = exporter.generate_excel_report(reports)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<22} | {len(created):>7} | {best * 1000:>9.1f} | {len(data):>10}")
+
+print(f"{len(DATES)} sheets, best of {ROUNDS}")
+print(f"{'Formats':<22} | {'created':>7} | {'ms':>9} | {'bytes':>10}")
+print("-" * 57)
+exporter.generate_excel_report(reports[:1])  # warm-up
+shared = exporter.workbook_formats
+exporter.workbook_formats = counting(per_sheet_formats)
+bench("per sheet")
+exporter.workbook_formats = counting(shared)
+bench("shared per workbook")
+exporter.workbook_formats = shared
@@ -69,40 +69,65 @@ def init_db():
         conn_local.commit()
         conn_local.close()
 
-def save_report(ref_filename, res_filename, analysis_date, final_df):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+REPORT_DATA_SOURCE = ['Branch', 'Year', 'No of Registered Students', 'No of Students Appeared', 'No of Students Absent',
+                      'Zero Problems Solved', 'One Problem Solved', 'Two Problems Solved', 'Three Problems Solved']
+
+def report_data_rows(report_id, final_df):
+    """Parameter tuples for report_data, built column by column rather than row by row."""
+    columns = [final_df['Branch'].tolist(), final_df['Year'].tolist()]
+    columns += [final_df[col].astype('int64').tolist() for col in REPORT_DATA_SOURCE[2:]]
+    return [(report_id, *row) for row in zip(*columns)]
+
+def report_total_students(final_df):
     total_row = final_df[final_df['Branch'] == 'OVERALL TOTAL']
-    total_students = int(total_row.iloc[0]['No of Registered Students']) if not total_row.empty else 0
+    return int(total_row.iloc[0]['No of Registered Students']) if not total_row.empty else 0
+
+def save_reports(reports):
+    """
+    Save [(ref_filename, res_filename, analysis_date, final_df), ...] in a single
+    transaction, with one executemany per report. Returns the new report ids.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    report_ids = []
 
     conn = get_connection()
     if conn:
         with conn.session as s:
-            # 1. Insert Metadata
-            res = s.execute("INSERT INTO reports (timestamp, ref_filename, res_filename, analysis_date, total_students) VALUES (:t, :ref, :res, :ad, :tot) RETURNING id", 
-                         {"t": timestamp, "ref": ref_filename, "res": res_filename, "ad": analysis_date, "tot": total_students})
-            report_id = res.fetchone()[0]
-            
-            # 2. Insert Data
-            for _, row in final_df.iterrows():
-                s.execute("""INSERT INTO report_data (report_id, branch, year, registered, appeared, absent, zero_solved, one_solved, two_solved, three_solved) 
-                           VALUES (:rid, :b, :y, :r, :a, :ab, :z, :o, :t, :th)""",
-                         {"rid": report_id, "b": row['Branch'], "y": row['Year'], "r": int(row['No of Registered Students']), 
-                          "a": int(row['No of Students Appeared']), "ab": int(row['No of Students Absent']), 
-                          "z": int(row['Zero Problems Solved']), "o": int(row['One Problem Solved']), 
-                          "t": int(row['Two Problems Solved']), "th": int(row['Three Problems Solved'])})
-            s.commit()
-            return report_id
-    else:
-        conn_local = sqlite3.connect("history.db")
-        c = conn_local.cursor()
-        c.execute("INSERT INTO reports (timestamp, ref_filename, res_filename, analysis_date, total_students) VALUES (?, ?, ?, ?, ?)", (timestamp, ref_filename, res_filename, analysis_date, total_students))
-        report_id = c.lastrowid
-        for _, row in final_df.iterrows():
-            c.execute("INSERT INTO report_data (report_id, branch, year, registered, appeared, absent, zero_solved, one_solved, two_solved, three_solved) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                     (report_id, row['Branch'], row['Year'], int(row['No of Registered Students']), int(row['No of Students Appeared']), int(row['No of Students Absent']), int(row['Zero Problems Solved']), int(row['One Problem Solved']), int(row['Two Problems Solved']), int(row['Three Problems Solved'])))
-        conn_local.commit()
+            try:
+                for ref_filename, res_filename, analysis_date, final_df in reports:
+                    # 1. Insert Metadata
+                    res = s.execute("INSERT INTO reports (timestamp, ref_filename, res_filename, analysis_date, total_students) VALUES (:t, :ref, :res, :ad, :tot) RETURNING id", 
+                                 {"t": timestamp, "ref": ref_filename, "res": res_filename, "ad": analysis_date, "tot": report_total_students(final_df)})
+                    report_id = res.fetchone()[0]
+
+                    # 2. Insert Data (a list of parameter sets runs as one executemany)
+                    keys = ("rid", "b", "y", "r", "a", "ab", "z", "o", "t", "th")
+                    s.execute("""INSERT INTO report_data (report_id, branch, year, registered, appeared, absent, zero_solved, one_solved, two_solved, three_solved) 
+                               VALUES (:rid, :b, :y, :r, :a, :ab, :z, :o, :t, :th)""",
+                             [dict(zip(keys, row)) for row in report_data_rows(report_id, final_df)])
+                    report_ids.append(report_id)
+                s.commit()
+            except Exception:
+                s.rollback()
+                raise
+        return report_ids
+
+    conn_local = sqlite3.connect("history.db")
+    try:
+        with conn_local:
+            c = conn_local.cursor()
+            for ref_filename, res_filename, analysis_date, final_df in reports:
+                c.execute("INSERT INTO reports (timestamp, ref_filename, res_filename, analysis_date, total_students) VALUES (?, ?, ?, ?, ?)", (timestamp, ref_filename, res_filename, analysis_date, report_total_students(final_df)))
+                report_id = c.lastrowid
+                c.executemany("INSERT INTO report_data (report_id, branch, year, registered, appeared, absent, zero_solved, one_solved, two_solved, three_solved) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              report_data_rows(report_id, final_df))
+                report_ids.append(report_id)
+    finally:
         conn_local.close()
-        return report_id
+    return report_ids
+
+def save_report(ref_filename, res_filename, analysis_date, final_df):
+    return save_reports([(ref_filename, res_filename, analysis_date, final_df)])[0]
 
 def get_all_reports():
     conn = get_connection()
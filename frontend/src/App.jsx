@@ -6,6 +6,7 @@ const API_BASE = 'http://localhost:8000';
 
 function App() {
   const [files, setFiles] = useState([]);
+  const [uploadIds, setUploadIds] = useState([]);
   const [reports, setReports] = useState([]);
   const [weeklyReport, setWeeklyReport] = useState(null);
   const [topPerformers, setTopPerformers] = useState([]);
@@ -17,6 +18,7 @@ function App() {
   const [perfBranch, setPerfBranch] = useState('OVERALL');
   const [perfTopN, setPerfTopN] = useState(50);
   const [performanceViewActive, setPerformanceViewActive] = useState(false);
+  const [leaderboardReady, setLeaderboardReady] = useState(false);
 
   useEffect(() => {
     if (isLoggedIn) {
@@ -24,6 +26,17 @@ function App() {
     }
   }, [isLoggedIn]);
 
+  // Once the server holds a ranked leaderboard, department/top-N changes are just slices of it.
+  // Only the filter controls call this; the analysis itself already returns the first slice.
+  const fetchLeaderboardSlice = (branch, topN) => {
+    if (!leaderboardReady) return;
+    const params = new URLSearchParams({ branch, top_n: topN });
+    fetch(`${API_BASE}/performance/leaderboard?${params}`)
+      .then(res => (res.ok ? res.json() : Promise.reject(res)))
+      .then(data => setTopPerformers(Array.isArray(data) ? data : []))
+      .catch(() => setLeaderboardReady(false));
+  };
+
   const fetchHistory = async () => {
     try {
       const res = await fetch(`${API_BASE}/history`);
@@ -45,13 +58,30 @@ function App() {
 
   const handleFileChange = (e) => {
     setFiles(Array.from(e.target.files));
+    setUploadIds([]);
+    setLeaderboardReady(false);
+  };
+
+  // Re-use the server's parsed copies once the current files have been uploaded
+  const buildFormData = () => {
+    const formData = new FormData();
+    if (uploadIds.length > 0) {
+      uploadIds.forEach(id => formData.append('upload_ids', id));
+    } else {
+      files.forEach(f => formData.append('files', f));
+    }
+    return formData;
+  };
+
+  const rememberUploadIds = (res) => {
+    const ids = res.headers.get('X-Upload-Ids');
+    if (ids) setUploadIds(ids.split(','));
   };
 
   const handleUpload = async () => {
     if (files.length === 0) return;
     setLoading(true);
-    const formData = new FormData();
-    files.forEach(f => formData.append('files', f));
+    const formData = buildFormData();
 
     try {
       const res = await fetch(`${API_BASE}/process`, {
@@ -59,9 +89,11 @@ function App() {
         body: formData
       });
       if (!res.ok) {
+        if (res.status === 404) setUploadIds([]);
         const errData = await res.json();
         throw new Error(errData.detail || 'Upload failed');
       }
+      rememberUploadIds(res);
       const data = await res.json();
       setReports(data);
       setWeeklyReport(null);
@@ -78,8 +110,7 @@ function App() {
   const handleWeeklyAnalysis = async () => {
     if (files.length === 0) return;
     setLoading(true);
-    const formData = new FormData();
-    files.forEach(f => formData.append('files', f));
+    const formData = buildFormData();
 
     try {
       const res = await fetch(`${API_BASE}/weekly`, {
@@ -87,9 +118,11 @@ function App() {
         body: formData
       });
       if (!res.ok) {
+        if (res.status === 404) setUploadIds([]);
         const errData = await res.json();
         throw new Error(errData.detail || 'Weekly analysis failed');
       }
+      rememberUploadIds(res);
       const data = await res.json();
       setWeeklyReport(data);
       setReports([]);
@@ -105,8 +138,7 @@ function App() {
   const handlePerformanceAnalysis = async () => {
     if (files.length === 0) return;
     setLoading(true);
-    const formData = new FormData();
-    files.forEach(f => formData.append('files', f));
+    const formData = buildFormData();
     formData.append('top_n', perfTopN);
     formData.append('branch', perfBranch);
 
@@ -116,15 +148,18 @@ function App() {
         body: formData
       });
       if (!res.ok) {
+        if (res.status === 404) setUploadIds([]);
         const errData = await res.json();
         throw new Error(errData.detail || 'Performance analysis failed');
       }
+      rememberUploadIds(res);
       const data = await res.json();
       console.log('Performance result:', data);
       setTopPerformers(Array.isArray(data) ? data : []);
       setReports([]);
       setWeeklyReport(null);
       setPerformanceViewActive(true);
+      setLeaderboardReady(true);
     } catch (err) {
       alert('Performance analysis failed: ' + err.message);
     } finally {
@@ -306,7 +341,7 @@ function App() {
                   className="btn btn-secondary"
                   style={{ background: 'var(--bg-color)', width: '100%', textAlign: 'left', padding: '0.6rem' }}
                   value={perfBranch}
-                  onChange={(e) => setPerfBranch(e.target.value)}
+                  onChange={(e) => { setPerfBranch(e.target.value); fetchLeaderboardSlice(e.target.value, perfTopN); }}
                 >
                   <option value="OVERALL">OVERALL</option>
                   <option value="CSE">CSE</option>
@@ -333,7 +368,7 @@ function App() {
                   step="10"
                   style={{ width: '100%', marginTop: '0.5rem' }}
                   value={perfTopN}
-                  onChange={(e) => setPerfTopN(parseInt(e.target.value))}
+                  onChange={(e) => { setPerfTopN(parseInt(e.target.value)); fetchLeaderboardSlice(perfBranch, parseInt(e.target.value)); }}
                 />
               </div>
             </div>
@@ -0,0 +1,104 @@
+import warnings
+import numpy as np
+import pandas as pd
+from backend.processor import STATIC_STRENGTH, extract_date_from_val, normalize_branch, normalize_year_val
+from backend import processor
+
+warnings.simplefilter("ignore", UserWarning)
+
+# Reference: the per-date, per-group filtering implementation the grouped
+# aggregation replaced (copied from the original processor.py)
+REGISTERED_COUNTS_DF = pd.DataFrame(STATIC_STRENGTH)
+
+def reference_daily_reports(df_res):
+    df_res['Branch'] = df_res['Branch'].ffill()
+    df_res['Year'] = df_res['Year'].ffill()
+    df_res['Branch'] = df_res['Branch'].fillna('Unknown').astype(str).str.strip().str.upper()
+    df_res['Year'] = df_res['Year'].fillna('Unknown').astype(str).str.strip().str.upper()
+
+    mask_yr = df_res['Year'].astype(str).str.upper().str.contains('CITAR', na=False)
+    df_res.loc[mask_yr, 'Year'] = 'CITAR-III'
+    if 'Reg No' in df_res.columns:
+        mask_reg = df_res['Reg No'].astype(str).str.upper().str.contains('CITAR', na=False)
+        df_res.loc[mask_reg, 'Year'] = 'CITAR-III'
+
+    if 'Timestamp' in df_res.columns:
+        df_res['Derived_Date'] = df_res['Timestamp'].apply(extract_date_from_val)
+    else:
+        df_res['Derived_Date'] = "Not Detected"
+    df_res['Derived_Date'] = df_res['Derived_Date'].fillna("Not Detected")
+
+    final_reports = []
+    year_sort_map = {"I": 1, "II": 2, "III": 3, "CITAR-III": 4, "IV": 5}
+    for d_str in df_res['Derived_Date'].unique():
+        df_date = df_res[df_res['Derived_Date'] == d_str].copy()
+        df_date['Branch'] = df_date['Branch'].apply(normalize_branch)
+        df_date['Year'] = df_date['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
+        df_date['Solved count'] = pd.to_numeric(df_date['Solved count'], errors='coerce').fillna(0).astype(int)
+
+        raw_rows = []
+        for (branch, year), group in df_date.groupby(['Branch', 'Year']):
+            reg = REGISTERED_COUNTS_DF[(REGISTERED_COUNTS_DF['Branch'] == branch) & (REGISTERED_COUNTS_DF['Year'] == year)]
+            reg_val = int(reg.iloc[0]['Registered_Count']) if not reg.empty else 0
+            raw_rows.append({
+                "Branch": branch, "Year": year,
+                "No of Registered Students": reg_val,
+                "No of Students Appeared": len(group),
+                "No of Students Absent": max(0, reg_val - len(group)),
+                "Zero Problems Solved": len(group[group['Solved count'] == 0]),
+                "One Problem Solved": len(group[group['Solved count'] == 1]),
+                "Two Problems Solved": len(group[group['Solved count'] == 2]),
+                "Three Problems Solved": len(group[group['Solved count'] >= 3])
+            })
+        if not raw_rows: continue
+
+        df_temp = pd.DataFrame(raw_rows)
+        final_rows = []
+        grand_total = {"Branch": "OVERALL TOTAL", "Year": "", "No of Registered Students": 0, "No of Students Appeared": 0, "No of Students Absent": 0, "Zero Problems Solved": 0, "One Problem Solved": 0, "Two Problems Solved": 0, "Three Problems Solved": 0}
+        for branch in sorted(df_temp['Branch'].unique()):
+            b_df = df_temp[df_temp['Branch'] == branch].copy()
+            b_df['Year_Sort'] = b_df['Year'].map(lambda x: year_sort_map.get(x, 99))
+            b_df = b_df.sort_values('Year_Sort')
+            for _, r in b_df.iterrows():
+                final_rows.append(r.to_dict())
+                for k in grand_total.keys():
+                    if k not in ["Branch", "Year"]: grand_total[k] += r[k]
+            if len(b_df) > 1:
+                subtotal = {"Branch": f"{branch} TOTAL", "Year": ""}
+                for k in processor.REPORT_COUNT_COLUMNS:
+                    subtotal[k] = int(b_df[k].sum())
+                final_rows.append(subtotal)
+        final_rows.append(grand_total)
+        final_reports.append({"date": d_str, "data": final_rows, "years_text": ", ".join(sorted(set(df_temp['Year'])))})
+    return final_reports
+
+rng = np.random.default_rng(1)
+BRANCHES = ['CSE', 'cse ', 'B.E. CSE', 'AI & DS', 'ECE', 'Mechanical Engineering', 'IT', 'CSBS', None, 'Unknown', 'CIVIL', 'BME', 'CS', 'XYZ']
+YEARS = ['II', '2', '2.0', 2, 'III YEAR', 'CITAR III', 'IV', 'I', None, 'foo']
+DATES = ['13-03-2024 10:00', '14-03-2024', '2024-03-15 09:00', '05/03/2024', None, 'garbage']
+SOLVED = [0, 1, 2, 3, 4, 7, -1, None, 'x', '2']
+
+def make_frame(n):
+    pick = lambda values: [values[i] for i in rng.integers(len(values), size=n)]
+    return pd.DataFrame({
+        'Reg No': pick(['21CS1', 'CITAR5', 'x', None]),
+        'Branch': pick(BRANCHES),
+        'Year': pick(YEARS),
+        'Solved count': pick(SOLVED),
+        'Timestamp': pick(DATES),
+    }, dtype=object)
+
+print(f"{'Case':<25} | {'Result'}")
+print("-" * 35)
+for n in [1, 5, 50, 3000]:
+    df = make_frame(n)
+    expected = reference_daily_reports(df.copy())
+    actual = processor.generate_daily_reports(df.copy())
+    print(f"{f'{n} random rows':<25} | {'PASS' if actual == expected else 'FAIL'}")
+
+no_timestamp = make_frame(40).drop(columns=['Timestamp'])
+same = processor.generate_daily_reports(no_timestamp.copy()) == reference_daily_reports(no_timestamp.copy())
+print(f"{'no Timestamp column':<25} | {'PASS' if same else 'FAIL'}")
+no_reg = make_frame(40).drop(columns=['Reg No'])
+same = processor.generate_daily_reports(no_reg.copy()) == reference_daily_reports(no_reg.copy())
+print(f"{'no Reg No column':<25} | {'PASS' if same else 'FAIL'}")
@@ -0,0 +1,36 @@
+import warnings
+import pandas as pd
+import numpy as np
+from backend.processor import extract_date_from_val, extract_dates
+
+# Batch extraction must agree with the per-value extractor, even when a
+# file mixes day-first and ambiguous dates (05/03/2025 after 13/02/2025)
+rng = np.random.default_rng(0)
+patterns = ["{d:02d}/{m:02d}/2025 10:00", "{m:02d}/{d:02d}/2025", "2025-{m:02d}-{d:02d} 09:15:00",
+            "{d}-{m}-2024", "{d:02d}-Mar-2025", "2025/{m}/{d}", "garbage", "", None]
+test_cases = ["13/02/2025 10:00", "05/03/2025 11:00"]
+for _ in range(500):
+    pattern = patterns[rng.integers(len(patterns))]
+    test_cases.append(pattern.format(d=rng.integers(1, 29), m=rng.integers(1, 13)) if pattern else pattern)
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    expected = [extract_date_from_val(v) for v in test_cases]
+with warnings.catch_warnings(record=True) as caught:
+    warnings.simplefilter("always")
+    actual = extract_dates(pd.Series(test_cases, dtype=object)).tolist()
+
+print(f"{'Case':<25} | {'Result'}")
+print("-" * 35)
+print(f"{'05/03/2025 after 13/02':<25} | {'PASS' if actual[1] == '03-05-2025' else 'FAIL'}")
+mismatches = sum(e != a for e, a in zip(expected, actual))
+print(f"{'matches per-value':<25} | {'PASS' if mismatches == 0 else f'FAIL ({mismatches})'}")
+print(f"{'no UserWarnings':<25} | {'PASS' if not caught else 'FAIL'}")
+
+# A cached compact format must not accept what the per-value parse rejects
+compact = ["20250310", "2025421", "202541", "20250421"]
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    expected = [extract_date_from_val(v) for v in compact]
+    actual = extract_dates(pd.Series(compact, dtype=object)).tolist()
+print(f"{'unpadded compact date':<25} | {'PASS' if actual == expected and actual[1] is None else 'FAIL'}")
@@ -0,0 +1,19 @@
+import pandas as pd
+import numpy as np
+from backend.processor import parse_duration_to_seconds, parse_durations
+
+# Column parser must agree with the scalar parser row for row
+test_cases = [
+    "01:02:03", "00:30:00", "1:2", "12:05", " 02:03 ", "1:2:3:4", "12:", ":12", "1::2",
+    "-1:30", "10:00:00.5", "abc", "N/A", "none", "", None, np.nan, 5, 3.5,
+]
+
+col = pd.Series(test_cases, dtype=object)
+actual = parse_durations(col).tolist()
+
+print(f"{'Input':<15} | {'Expected':<10} | {'Actual':<10} | {'Result'}")
+print("-" * 50)
+for inp, act in zip(test_cases, actual):
+    exp = parse_duration_to_seconds(inp)
+    res = "PASS" if act == exp else "FAIL"
+    print(f"{repr(inp):<15} | {exp:<10} | {act:<10} | {res}")
@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import warnings
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+scratch = tempfile.mkdtemp()
+os.environ["SKILLRACK_UPLOAD_DIR"] = os.path.join(scratch, "uploads")
+os.environ["SKILLRACK_EXPORT_CACHE_DIR"] = os.path.join(scratch, "exports")
+os.environ["SKILLRACK_INGEST_WORKERS"] = "1"
+warnings.simplefilter("ignore", UserWarning)
+
+import database
+database.DB_PATH = os.path.join(scratch, "history.db")
+import export_cache
+import exporter
+import main
+from fastapi.testclient import TestClient
+
+# Reference: the original list exporters, a plain to_excel of the records
+def reference_records_excel(records, sheet_name, reg_first=False):
+    output = io.BytesIO()
+    df = pd.DataFrame(records)
+    if reg_first and 'Reg No' in df.columns:
+        cols = df.columns.tolist()
+        cols.insert(0, cols.pop(cols.index('Reg No')))
+        df = df[cols]
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return output.getvalue()
+
+def same_sheets(actual, expected):
+    a = pd.read_excel(io.BytesIO(actual), sheet_name=None)
+    e = pd.read_excel(io.BytesIO(expected), sheet_name=None)
+    return list(a) == list(e) and all(a[name].equals(e[name]) for name in e)
+
+def daily_sheet_ok(ws, rep):
+    """Values and merges of one daily sheet against its report rows."""
+    merges = {str(r) for r in ws.merged_cells.ranges}
+    ok = ws['A2'].value == f"Date: {rep['date']}" and {'A1:I1', 'A2:I2', 'A3:I3', 'A4:A5', 'B4:B5', 'C4:E4', 'F4:I4'} <= merges
+    rows = rep['data']
+    i = 0
+    while i < len(rows):
+        excel_row = 6 + i
+        branch = rows[i]['Branch']
+        values = [ws.cell(excel_row, col).value for col in range(3, 10)]
+        ok = ok and values == [rows[i][key] for key in exporter.REPORT_COL_KEYS[2:]]
+        if "TOTAL" in branch:
+            label = "OVERALL TOTAL" if "OVERALL TOTAL" in branch else "TOTAL"
+            ok = ok and ws.cell(excel_row, 1).value == label and f"A{excel_row}:B{excel_row}" in merges
+            i += 1
+            continue
+        end = i
+        while end + 1 < len(rows) and rows[end + 1]['Branch'] == branch:
+            end += 1
+        ok = ok and ws.cell(excel_row, 1).value == branch
+        if end > i:
+            ok = ok and f"A{excel_row}:A{6 + end}" in merges
+        for j in range(i, end + 1):
+            ok = ok and ws.cell(6 + j, 2).value == rows[j]['Year']
+        i = end + 1
+    return ok
+
+HEADER = "Reg No,Name,Branch,Year,Solved count,Total submissions,Active utilisation,Timestamp\n"
+DAY_ONE = HEADER + "".join(f"{100 + i},S{i},{b},{y},{i % 5},{i % 7},00:{i % 60:02d}:00,2025-03-10 09:00\n"
+                           for i, (b, y) in enumerate([("CSE", "II"), ("CSE", "III"), ("ECE", "II"), ("IT", "II")] * 6))
+DAY_TWO = HEADER + "".join(f"{100 + i},S{i},{b},{y},{(i + 2) % 5},{i % 4},00:0{i % 10}:00,2025-03-11 10:00\n"
+                           for i, (b, y) in enumerate([("CSE", "II"), ("AIDS", "III"), ("ECE", "II")] * 5))
+
+def check(label, ok):
+    print(f"{label:<36} | {'PASS' if ok else 'FAIL'}")
+
+renders = []
+render = export_cache.render
+def counting_render(key, render_fn, *args):
+    renders.append(key)
+    return render(key, render_fn, *args)
+export_cache.render = counting_render
+
+print(f"{'Case':<36} | {'Result'}")
+print("-" * 46)
+with TestClient(main.app) as client:
+    files = [("files", ("one.csv", DAY_ONE.encode())), ("files", ("two.csv", DAY_TWO.encode()))]
+    reports = client.post("/process", files=files).json()
+
+    first = client.get("/download/daily")
+    etag = first.headers.get("etag")
+    wb = openpyxl.load_workbook(io.BytesIO(first.content))
+    check("daily workbook sheets", wb.sheetnames == [rep['date'] for rep in reports])
+    check("daily sheets match the reports", all(daily_sheet_ok(wb[rep['date']], rep) for rep in reports))
+    check("Content-Length and no-cache", first.headers.get("content-length") == str(len(first.content)) and first.headers.get("cache-control") == "no-cache")
+
+    # Conditional and repeated requests never render again
+    for label, header in [("matching If-None-Match is 304", etag), ("weak ETag is 304", f"W/{etag}"),
+                          ("ETag in a list is 304", f'"other", {etag}'), ("If-None-Match * is 304", "*")]:
+        res = client.get("/download/daily", headers={"If-None-Match": header})
+        check(label, res.status_code == 304 and res.content == b"" and res.headers.get("etag") == etag)
+    check("stale ETag gets the file", client.get("/download/daily", headers={"If-None-Match": '"stale"'}).content == first.content)
+    check("cached file served as is", client.get("/download/daily").content == first.content and len(renders) == 1)
+    check("legacy /download shares the cache", client.get("/download").headers.get("etag") == etag and len(renders) == 1)
+
+    # An evicted export renders again under the same key; xlsxwriter stamps
+    # the creation time, so the workbook is compared by its sheets
+    export_cache.evict(max_bytes=0)
+    again = client.get("/download/daily")
+    check("evicted export re-renders", len(renders) == 2 and again.headers.get("etag") == etag and same_sheets(again.content, first.content))
+
+    # New data means a new key
+    client.post("/process", files=files[:1])
+    check("new report changes the ETag", client.get("/download/daily").headers.get("etag") != etag)
+    client.post("/process", files=files)
+
+    # Flat formats read back as the flattened daily records
+    records = exporter.daily_records(reports)
+    expected = pd.DataFrame(records)[exporter.DAILY_RECORD_COLUMNS]
+    csv = client.get("/download/daily", params={"format": "csv"})
+    check("csv = daily records", pd.read_csv(io.StringIO(csv.text), keep_default_na=False).equals(expected))
+    jsonl = client.get("/download/daily", params={"format": "jsonl"})
+    lines = [json.loads(line) for line in jsonl.text.splitlines()]
+    check("jsonl = daily records", lines == expected.to_dict('records') and isinstance(lines[0]['Zero Problems Solved'], int))
+    res = client.get("/download/daily", params={"format": "csv"}, headers={"If-None-Match": csv.headers.get("etag")})
+    check("csv honours If-None-Match", res.status_code == 304)
+
+    # Weekly and performance workbooks read back like the original to_excel exports
+    weekly = client.post("/weekly", files=files).json()
+    res = client.get("/download/weekly")
+    check("weekly workbook = original", same_sheets(res.content, reference_records_excel(weekly, 'Weekly Leaderboard')))
+    performance = client.post("/performance", files=files, data={"top_n": "5", "branch": "CSE"}).json()
+    res = client.get("/download/performance")
+    check("performance workbook = original", same_sheets(res.content, reference_records_excel(performance, 'Top 5 CSE', reg_first=True)))
+
+    # Saved history is append-only and revalidated by id and count
+    history = client.get("/history")
+    check("history ETag 304", client.get("/history", headers={"If-None-Match": history.headers.get("etag")}).status_code == 304)
+    report_id = history.json()[0]['id']
+    detail = client.get(f"/history/{report_id}")
+    check("history detail ETag 304", client.get(f"/history/{report_id}", headers={"If-None-Match": detail.headers.get("etag")}).status_code == 304)
+    client.post("/process", files=files)
+    check("new save changes the history ETag", client.get("/history").headers.get("etag") != history.headers.get("etag"))
+    check("unknown report is empty", client.get("/history/999999").json() == [])
+
+    # Parquet takes Reg No columns mixing numbers and text
+    mixed = [{"Reg No": 1001, "Name": "A", "Total Solved": 3}, {"Reg No": "CITAR5", "Name": "B", "Total Solved": 1}]
+    if exporter.PARQUET_AVAILABLE:
+        table = pd.read_parquet(io.BytesIO(exporter.generate_parquet(mixed, ["Reg No", "Name", "Total Solved"])))
+        check("parquet with mixed Reg No", table["Reg No"].tolist() == ["1001", "CITAR5"] and table["Total Solved"].tolist() == [3, 1])
+    else:
+        print(f"{'parquet with mixed Reg No':<36} | SKIP (no pyarrow)")
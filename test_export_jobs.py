@@ -0,0 +1,130 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+import zipfile
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+scratch = tempfile.mkdtemp()
+os.environ["SKILLRACK_UPLOAD_DIR"] = os.path.join(scratch, "uploads")
+os.environ["SKILLRACK_EXPORT_CACHE_DIR"] = os.path.join(scratch, "exports")
+os.environ["SKILLRACK_EXPORT_JOB_DIR"] = os.path.join(scratch, "jobs")
+# Render in the calling thread; the ZIP pool runs the same render_date_workbook
+os.environ["SKILLRACK_INGEST_WORKERS"] = "1"
+os.environ["SKILLRACK_EXPORT_WORKERS"] = "1"
+warnings.simplefilter("ignore", UserWarning)
+
+import database
+database.DB_PATH = os.path.join(scratch, "history.db")
+import export_jobs
+import main
+from fastapi.testclient import TestClient
+
+HEADER = "Reg No,Name,Branch,Year,Solved count,Total submissions,Active utilisation,Timestamp\n"
+ROWS = "".join(f"{100 + i},S{i},{b},II,{i % 5},{i % 7},00:{i % 60:02d}:00,2025-03-{10 + i % 3} 09:00\n"
+               for i, b in enumerate(["CSE", "ECE", "IT", "AIDS"] * 10))
+
+def check(label, ok):
+    print(f"{label:<36} | {'PASS' if ok else 'FAIL'}")
+
+def events(client, job_id):
+    """(event, data) pairs of a job's SSE stream, read until the server closes it."""
+    with client.stream("GET", f"/exports/{job_id}/events") as res:
+        body = "".join(res.iter_text())
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+def finished(client, job_id):
+    return events(client, job_id)[-1]
+
+def staged_render(gate):
+    # Reports three progress steps, holding before the last until `gate` is set
+    def render(output=None, progress=None):
+        for done in range(1, 4):
+            if done == 3: gate.wait(5)
+            progress(done, 3)
+            time.sleep(0.2)
+        output.write(b"rendered")
+    return render
+
+def failing_render(output=None, progress=None):
+    raise RuntimeError("renderer broke")
+
+print(f"{'Case':<36} | {'Result'}")
+print("-" * 46)
+main.EXPORT_EVENT_INTERVAL = 0.02
+with TestClient(main.app) as client:
+    check("job before any report is 400", client.post("/exports", data={"kind": "daily"}).status_code == 400)
+    reports = client.post("/process", files=[("files", ("week.csv", (HEADER + ROWS).encode()))]).json()
+
+    # Each job renders what the matching /download endpoint serves
+    res = client.post("/exports", data={"kind": "daily", "format": "xlsx"})
+    job = res.json()
+    check("submit is 202 with a job", res.status_code == 202 and job["status"] in ("queued", "running", "done") and job["filename"] == "Skill_Rack_Daily_Analysis.xlsx")
+    event, state = finished(client, job["id"])
+    check("daily job ends with done", event == "done" and state["done"] == state["total"] == len(reports))
+    download = client.get(f"/exports/{job['id']}/download")
+    expected = pd.read_excel(io.BytesIO(client.get("/download/daily").content), sheet_name=None)
+    actual = pd.read_excel(io.BytesIO(download.content), sheet_name=None)
+    check("xlsx job = /download/daily", list(actual) == list(expected) and all(actual[s].equals(expected[s]) for s in expected))
+    check("job download headers", download.headers.get("content-length") == str(len(download.content))
+          and "Skill_Rack_Daily_Analysis.xlsx" in download.headers.get("content-disposition", ""))
+
+    job = client.post("/exports", data={"kind": "daily", "format": "csv"}).json()
+    finished(client, job["id"])
+    check("csv job = /download/daily", client.get(f"/exports/{job['id']}/download").content == client.get("/download/daily", params={"format": "csv"}).content)
+
+    job = client.post("/exports", data={"kind": "daily", "format": "zip"}).json()
+    finished(client, job["id"])
+    bundle = zipfile.ZipFile(io.BytesIO(client.get(f"/exports/{job['id']}/download").content))
+    check("zip job has one workbook per date", len(bundle.namelist()) == len(reports) and all(name.endswith(".xlsx") for name in bundle.namelist()))
+
+    client.post("/weekly", files=[("files", ("week.csv", (HEADER + ROWS).encode()))])
+    job = client.post("/exports", data={"kind": "weekly", "format": "jsonl"}).json()
+    finished(client, job["id"])
+    check("weekly jsonl job = /download/weekly", client.get(f"/exports/{job['id']}/download").content == client.get("/download/weekly", params={"format": "jsonl"}).content)
+
+    check("unknown kind is 400", client.post("/exports", data={"kind": "monthly"}).status_code == 400)
+    check("zip of weekly is 400", client.post("/exports", data={"kind": "weekly", "format": "zip"}).status_code == 400)
+
+    # Progress streams as it happens; the download waits for the job
+    gate = threading.Event()
+    job = export_jobs.submit(staged_render(gate), (), "staged.bin", "application/octet-stream")
+    time.sleep(0.1)
+    check("download while running is 409", client.get(f"/exports/{job['id']}/download").status_code == 409)
+    gate.set()
+    stream = events(client, job["id"])
+    progress = [state["done"] for event, state in stream if event == "progress"]
+    check("progress events then done", stream[-1][0] == "done" and progress and progress == sorted(progress) and stream[-1][1]["done"] == 3)
+    check("finished job downloads", client.get(f"/exports/{job['id']}/download").content == b"rendered")
+
+    job = export_jobs.submit(failing_render, (), "broken.bin", "application/octet-stream")
+    event, state = finished(client, job["id"])
+    check("failed job reports its error", event == "failed" and state["error"] == "renderer broke")
+    check("failed job download is 409", client.get(f"/exports/{job['id']}/download").status_code == 409)
+    check("no temp file left by a failure", not any(name.endswith(".tmp") for name in os.listdir(export_jobs.EXPORT_JOB_DIR)))
+
+    unknown = "0" * 32
+    check("unknown job is 404", all(client.get(path).status_code == 404 for path in
+                                    (f"/exports/{unknown}", f"/exports/{unknown}/events", f"/exports/{unknown}/download")))
+    check("status hides internal fields", set(client.get(f"/exports/{job['id']}").json()) == set(export_jobs.PUBLIC_FIELDS))
+
+    # Finished jobs expire after the TTL, files included; stray old files are swept too
+    done_job = client.post("/exports", data={"kind": "daily", "format": "csv"}).json()
+    finished(client, done_job["id"])
+    path = export_jobs.get(done_job["id"])["path"]
+    stray = os.path.join(export_jobs.EXPORT_JOB_DIR, "left-over.export")
+    open(stray, "wb").close()
+    later = time.time() + export_jobs.EXPORT_JOB_TTL + 1
+    export_jobs.sweep(now=later)
+    export_jobs.sweep_files(now=later)
+    check("expired job is forgotten", client.get(f"/exports/{done_job['id']}").status_code == 404 and not os.path.exists(path))
+    check("stray job files are swept", not os.path.exists(stray))
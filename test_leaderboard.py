@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+scratch = tempfile.mkdtemp()
+os.environ["SKILLRACK_UPLOAD_DIR"] = os.path.join(scratch, "uploads")
+os.environ["SKILLRACK_INGEST_WORKERS"] = "1"
+warnings.simplefilter("ignore", UserWarning)
+
+import database
+database.DB_PATH = os.path.join(scratch, "history.db")
+import processor
+import main
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+# Reference: the original /performance, re-aggregating and fully sorting per request
+def reference_top_performers(df, top_n):
+    if df.empty:
+        return []
+    df_calc = df.copy()
+    df_calc['Solved count'] = pd.to_numeric(df_calc['Total Solved'], errors='coerce').fillna(0)
+    df_calc['Total submissions'] = pd.to_numeric(df_calc['Total Submissions'], errors='coerce').fillna(0)
+    df_calc['Active_Secs'] = df_calc['Active_Secs_Total']
+    ranked = df_calc.sort_values(by=['Solved count', 'Active_Secs', 'Total submissions'], ascending=[False, True, True]).head(top_n).reset_index(drop=True)
+    return ranked.to_dict('records')
+
+def reference_performance(frames, branch, top_n):
+    combined_df = pd.concat(frames, ignore_index=True)
+    if branch != "OVERALL":
+        combined_df['Branch'] = combined_df['Branch'].apply(processor.normalize_branch)
+        combined_df = combined_df[combined_df['Branch'] == branch]
+    if combined_df.empty: return []
+    return jsonable_encoder(reference_top_performers(pd.DataFrame(processor.generate_weekly_report(combined_df)), top_n))
+
+rng = np.random.default_rng(7)
+STUDENTS = [(1000 + i, rng.choice(["CSE", "ECE", "IT", "AI & DS"]), rng.choice(["II", "III"])) for i in range(60)]
+
+def make_csv(day):
+    rows = ["Reg No,Name,Branch,Year,Solved count,Total submissions,Active utilisation,Timestamp"]
+    for reg, branch, year in STUDENTS:
+        if rng.random() < 0.2: continue
+        # Few distinct values, so ties go down to the last sort key
+        rows.append(f"{reg},S{reg},{branch},{year},{rng.integers(0, 4)},{rng.integers(0, 4)},00:{rng.choice([5, 10, 15]):02d}:00,{day} 09:00")
+    return ("\n".join(rows) + "\n").encode()
+
+FILES = {"mon.csv": make_csv("2025-03-10"), "tue.csv": make_csv("2025-03-11")}
+FRAMES = [processor.standardize_columns(pd.read_csv(io.BytesIO(data))) for data in FILES.values()]
+uploads = [("files", (name, data)) for name, data in FILES.items()]
+
+def check(label, ok):
+    print(f"{label:<36} | {'PASS' if ok else 'FAIL'}")
+
+print(f"{'Case':<36} | {'Result'}")
+print("-" * 46)
+with TestClient(main.app) as client:
+    check("slice before analysis is 400", client.get("/performance/leaderboard").status_code == 400)
+
+    res = client.post("/performance", files=uploads, data={"top_n": "10"})
+    check("overall top 10 = original", res.json() == reference_performance(FRAMES, "OVERALL", 10))
+    check("X-Total-Count", res.headers.get("x-total-count") == str(len(reference_performance(FRAMES, "OVERALL", 1000))))
+    for branch in ["CSE", "ECE", "AIDS", "MECH"]:
+        sliced = client.get("/performance/leaderboard", params={"branch": branch, "top_n": 8}).json()
+        check(f"{branch} slice = original", sliced == reference_performance(FRAMES, branch, 8))
+
+    everyone = reference_performance(FRAMES, "OVERALL", 1000)
+    page = client.get("/performance/leaderboard", params={"top_n": 5, "offset": 5}).json()
+    check("offset pages the ranking", page == everyone[5:10])
+    year = client.get("/performance/leaderboard", params={"year": "III", "top_n": 1000}).json()
+    check("year view keeps the overall order", year == [r for r in everyone if r["Year"] == "III"])
+    check("negative offset is 400", client.get("/performance/leaderboard", params={"offset": -1}).status_code == 400)
+
+    # After a branch-filtered analysis every department still switches instantly
+    ids = res.headers.get("x-upload-ids").split(",")
+    res = client.post("/performance", data={"upload_ids": ids, "top_n": "5", "branch": "CSE"})
+    check("branch analysis = original", res.json() == reference_performance(FRAMES, "CSE", 5))
+    for branch in ["ECE", "OVERALL", "CSE"]:
+        sliced = client.get("/performance/leaderboard", params={"branch": branch, "top_n": 5})
+        check(f"switch to {branch} after CSE", sliced.status_code == 200 and sliced.json() == reference_performance(FRAMES, branch, 5))
+
+    # The download follows the last slice
+    client.get("/performance/leaderboard", params={"branch": "IT", "top_n": 3})
+    check("download follows the slice", client.get("/download/performance", params={"format": "jsonl"}).text.count("\n") == len(reference_performance(FRAMES, "IT", 3)))
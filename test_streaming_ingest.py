@@ -0,0 +1,112 @@
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+scratch = tempfile.mkdtemp()
+os.environ["SKILLRACK_UPLOAD_DIR"] = os.path.join(scratch, "uploads")
+os.environ["SKILLRACK_SPOOL_DIR"] = os.path.join(scratch, "spool")
+# Parse in the calling thread; the pool runs the same parse_upload
+os.environ["SKILLRACK_INGEST_WORKERS"] = "1"
+os.makedirs(os.environ["SKILLRACK_SPOOL_DIR"])
+warnings.simplefilter("ignore", UserWarning)
+
+import database
+database.DB_PATH = os.path.join(scratch, "history.db")
+import ingest
+import processor
+import upload_store
+import main
+from processor import extract_date_from_val, normalize_branch, normalize_year_val, parse_duration_to_seconds
+from fastapi.testclient import TestClient
+
+# Reference: the weekly aggregation of the original processor.py
+def reference_weekly_report(df_res):
+    df_weekly = df_res.copy()
+    df_weekly['Branch'] = df_weekly['Branch'].apply(normalize_branch)
+    df_weekly['Year'] = df_weekly['Year'].astype(str).replace(r'\.0$', '', regex=True).apply(normalize_year_val)
+    df_weekly['Solved count'] = pd.to_numeric(df_weekly['Solved count'], errors='coerce').fillna(0).astype(int)
+    df_weekly['Derived_Date'] = df_weekly['Timestamp'].apply(extract_date_from_val)
+    df_weekly['Active_Secs_Agg'] = df_weekly['Active utilisation'].apply(parse_duration_to_seconds).replace(99999999, 0)
+    daily_student = df_weekly.groupby(['Reg No', 'Derived_Date']).agg({
+        'Solved count': 'max', 'Total submissions': 'max', 'Active_Secs_Agg': 'max',
+        'Branch': 'first', 'Year': 'first', 'Name': 'first'
+    }).reset_index()
+    weekly_grouped = daily_student.groupby('Reg No').agg({
+        'Derived_Date': 'nunique', 'Solved count': 'sum', 'Total submissions': 'sum',
+        'Active_Secs_Agg': 'sum', 'Branch': 'first', 'Year': 'first', 'Name': 'first'
+    }).reset_index()
+    weekly_grouped.columns = ['Reg No', 'Days Appeared', 'Total Solved', 'Total Submissions', 'Active_Secs_Total', 'Branch', 'Year', 'Name']
+    return weekly_grouped.sort_values(by=['Total Solved', 'Total Submissions'], ascending=[False, True]).reset_index(drop=True)
+
+def as_json(df):
+    return json.loads(df.to_json(orient='records'))
+
+rng = np.random.default_rng(3)
+
+def make_csv(n, first_reg):
+    # Blank Branch/Year cells are forward-filled across chunk boundaries
+    rows = ["Regn No,Student Name,Department,Batch,Problems Solved,Total Attempts,Active Utilization,Date"]
+    for i in range(n):
+        branch = rng.choice(["CSE", "ECE", "AI & DS", "IT", ""])
+        year = rng.choice(["II", "III", "2", "CITAR III", ""])
+        active = "" if rng.random() < 0.1 else f"00:{rng.integers(0, 60):02d}:{rng.integers(0, 60):02d}"
+        stamp = rng.choice(["2025-03-10 09:00", "2025-03-11 14:30", "13-03-2025", "2025/03/14"])
+        reg = first_reg + rng.integers(0, n // 3 + 1)
+        rows.append(f"{reg},S{reg},{branch},{year},{rng.integers(0, 5)},{rng.integers(0, 9)},{active},{stamp}")
+    return ("\n".join(rows) + "\n").encode()
+
+FILES = {"a.csv": make_csv(120, 1000), "b.csv": make_csv(80, 1030)}
+
+def uploads(names):
+    return [("files", (name, FILES[name])) for name in names]
+
+def check(label, ok):
+    print(f"{label:<36} | {'PASS' if ok else 'FAIL'}")
+
+combined = pd.concat([processor.standardize_columns(pd.read_csv(io.BytesIO(FILES[name]))).assign(Source_Filename=name) for name in FILES], ignore_index=True)
+
+print(f"{'Case':<36} | {'Result'}")
+print("-" * 46)
+with TestClient(main.app) as client:
+    # Chunks far smaller than the files, so every state carry is exercised
+    ingest.STREAM_CHUNK_ROWS = 7
+    in_memory = client.post("/process", files=uploads(FILES))
+    check("in-memory daily = processor", in_memory.json() == processor.generate_daily_reports(combined.copy()))
+    streamed = client.post("/process", files=uploads(FILES), data={"stream": "true"})
+    check("streamed daily = in-memory", streamed.json() == in_memory.json())
+
+    expected_weekly = as_json(reference_weekly_report(combined.drop(columns=['Source_Filename'])))
+    weekly = client.post("/weekly", files=uploads(FILES)).json()
+    check("in-memory weekly = original", weekly == expected_weekly)
+    streamed_weekly = client.post("/weekly", files=uploads(FILES), data={"stream": "true"}).json()
+    check("streamed weekly = original", streamed_weekly == expected_weekly)
+
+    # Upload store: IDs stand in for the files, in either mode
+    ids = [u["upload_id"] for u in client.post("/uploads", files=uploads(FILES)).json()]
+    check("upload ids are content hashes", ids == [hashlib.sha256(FILES[name]).hexdigest() for name in FILES])
+    check("parsed uploads are stored", all(upload_store.get(i) is not None for i in ids))
+    by_id = client.post("/process", data={"upload_ids": ids})
+    check("daily by upload id = by file", by_id.json() == in_memory.json())
+    check("streamed daily by upload id", client.post("/process", data={"upload_ids": ids, "stream": "true"}).json() == in_memory.json())
+    check("weekly by upload id = by file", client.post("/weekly", data={"upload_ids": ids}).json() == weekly)
+    check("X-Upload-Ids header", by_id.headers.get("x-upload-ids") == ",".join(ids))
+    check("unknown upload id is 404", client.post("/process", data={"upload_ids": ["0" * 64]}).status_code == 404)
+    check("malformed upload id is 400", client.post("/process", data={"upload_ids": ["../etc"]}).status_code == 400)
+
+    # The same file twice counts twice, as two concatenated copies would
+    twice = client.post("/process", files=uploads(["a.csv", "a.csv"])).json()
+    frame = processor.standardize_columns(pd.read_csv(io.BytesIO(FILES["a.csv"]))).assign(Source_Filename="a.csv")
+    check("repeated file counts twice", twice == processor.generate_daily_reports(pd.concat([frame, frame], ignore_index=True)))
+
+    check("unreadable file is 400", client.post("/process", files=[("files", ("bad.xlsx", b"not a workbook"))]).status_code == 400)
+    check("spool files are removed", os.listdir(os.environ["SKILLRACK_SPOOL_DIR"]) == [])
+
+    ingest.MAX_UPLOAD_BYTES = 1024
+    check("oversized upload is 413", client.post("/process", files=uploads(["a.csv"])).status_code == 413)
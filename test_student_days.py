@@ -0,0 +1,106 @@
+import io
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+scratch = tempfile.mkdtemp()
+os.environ["SKILLRACK_UPLOAD_DIR"] = os.path.join(scratch, "uploads")
+
+import database
+database.DB_PATH = os.path.join(scratch, "history.db")
+import ingest
+import processor
+import main
+from fastapi.testclient import TestClient
+
+# Student-day table and stored leaderboards, checked against the in-memory weekly report
+HEADER = "Reg No,Name,Branch,Year,Solved count,Total submissions,Active utilisation,Timestamp\n"
+MON = "\n".join([
+    "101,Asha,CSE,II,2,5,00:10:00,2025-03-10 09:00",
+    "101,Asha,CSE,II,3,6,00:12:00,2025-03-10 15:00",
+    "102,Bala,ECE,III,1,2,00:05:00,2025-03-10 10:00",
+    "103,Chitra,IT,II,0,1,,2025-03-10 11:00",
+]) + "\n"
+TUE = "\n".join([
+    "101,Asha,CSE,II,1,2,00:03:00,2025-03-11 09:00",
+    "102,Bala,ECE,III,4,4,00:20:00,2025-03-11 10:00",
+    "104,Devi,CSE,III,2,3,00:07:00,2025-03-16 10:00",
+]) + "\n"
+NO_NAME = "Reg No,Branch,Year,Solved count,Timestamp\n201,CSE,II,2,12/03/2025\n202,ECE,II,0,12/03/2025\n"
+
+def check(label, ok):
+    print(f"{label:<40} | {'PASS' if ok else 'FAIL'}")
+
+def weekly_by_reg(records):
+    return sorted(({**r, 'Reg No': str(r['Reg No'])} for r in records), key=lambda r: r['Reg No'])
+
+print(f"{'Case':<40} | {'Result'}")
+print("-" * 50)
+with TestClient(main.app) as client:
+    # An ordinary daily export without a Name column must still process
+    res = client.post("/process", files=[("files", ("no_name.csv", NO_NAME.encode()))])
+    frame = processor.standardize_columns(pd.read_csv(io.StringIO(NO_NAME)))
+    frame['Source_Filename'] = "no_name.csv"
+    check("/process without Name", res.status_code == 200 and res.json() == processor.generate_daily_reports(frame))
+    check("no student rows without Name", database.get_student_leaderboard().empty)
+
+    files = [("files", ("mon.csv", (HEADER + MON).encode())), ("files", ("tue.csv", (HEADER + TUE).encode()))]
+    check("/process with Name", client.post("/process", files=files).status_code == 200)
+    expected = weekly_by_reg(client.post("/weekly", files=files).json())
+    stored = weekly_by_reg(client.get("/leaderboard").json())
+    check("stored leaderboard = weekly report", stored == expected)
+
+    # Re-ingesting the same days must not double count
+    client.post("/process", files=files)
+    check("re-ingest is idempotent", weekly_by_reg(client.get("/leaderboard").json()) == expected)
+
+    one_day = weekly_by_reg(client.get("/leaderboard", params={"start": "2025-03-11", "end": "2025-03-11"}).json())
+    check("single-day window", [r['Reg No'] for r in one_day] == ['101', '102'] and one_day[1]['Total Solved'] == 4)
+    whole_week = client.get("/leaderboard", params={"start": "2025-03-10", "end": "2025-03-16"}).json()
+    check("whole-week path = day path", weekly_by_reg(whole_week) == expected)
+    check("leaderboard columns", list(database.get_student_leaderboard().columns) == ['reg_no', 'days', 'solved', 'submissions', 'active_secs', 'branch', 'year', 'name'])
+    check("bad date is 400", client.get("/leaderboard", params={"start": "10-03-2025"}).status_code == 400)
+
+    # A missing value never erases a stored maximum
+    row = {'reg_no': '101', 'day': '2025-03-10', 'solved': None, 'submissions': None, 'active_secs': None, 'branch': 'CSE', 'year': 'II', 'name': 'Asha'}
+    database.upsert_student_days(pd.DataFrame([row]))
+    with database.connection() as conn:
+        kept = conn.execute("SELECT solved, submissions, active_secs FROM student_days WHERE reg_no = '101' AND day = '2025-03-10'").fetchone()
+    check("NULL upsert keeps stored maxima", kept == (3, 6, 720))
+
+    # Rolling windows end on the latest ingested day and match an explicit date window
+    for window, start in [("7d", "2025-03-10"), ("30d", "2025-02-15"), ("semester", "2025-01-01")]:
+        res = client.get(f"/leaderboard/{window}")
+        explicit = client.get("/leaderboard", params={"start": start, "end": "2025-03-16"}).json()
+        bounds = (res.headers.get("x-window-start"), res.headers.get("x-window-end"))
+        check(f"{window} window", bounds == (start, "2025-03-16") and weekly_by_reg(res.json()) == weekly_by_reg(explicit))
+    cse = client.get("/leaderboard/7d", params={"branch": "CSE", "year": "III"}).json()
+    check("window branch/year filter", [r['Reg No'] for r in cse] == ['104'])
+    check("unknown window is 404", client.get("/leaderboard/90d").status_code == 404)
+
+    # Startup only rebuilds windows whose bounds went stale
+    with database.transaction() as conn:
+        conn.execute("UPDATE window_totals SET solved = -1 WHERE window_name = '7d' AND reg_no = '104'")
+    database.init_db()
+    with database.connection() as conn:
+        kept = conn.execute("SELECT solved FROM window_totals WHERE window_name = '7d' AND reg_no = '104'").fetchone()
+    check("startup keeps current windows", kept == (-1,))
+    database.SEMESTER_START = "2025-03-11"
+    database.init_db()
+    with database.connection() as conn:
+        semester = conn.execute("SELECT start_day FROM window_meta WHERE window_name = 'semester'").fetchone()
+    check("startup rebuilds a stale window", semester == ("2025-03-11",) and len(client.get("/leaderboard/semester").json()) == 3)
+    try:
+        database._semester_start("2025-13-01")
+        check("bad SKILLRACK_SEMESTER_START", False)
+    except ValueError:
+        check("bad SKILLRACK_SEMESTER_START", True)
+
+    # Streamed uploads store the same student days, into a fresh database
+    database.DB_PATH = os.path.join(scratch, "streamed.db")
+    database.init_db()
+    ingest.STREAM_CHUNK_ROWS = 2
+    check("/process stream with Name", client.post("/process", files=files, data={"stream": "true"}).status_code == 200)
+    check("streamed stored leaderboard", weekly_by_reg(client.get("/leaderboard").json()) == expected)
@@ -0,0 +1,32 @@
+import pandas as pd
+import numpy as np
+from backend.processor import rank_top_n, rank_top_n_grouped
+
+# Partial selection must return exactly what a full sort + head returns, ties included
+rng = np.random.default_rng(0)
+n = 200
+df = pd.DataFrame({
+    "Solved count": rng.integers(0, 5, n).astype(float),
+    "Active_Secs": rng.choice([60, 120, 99999999], n),
+    "Total submissions": rng.integers(0, 3, n),
+    "Branch": rng.choice(["CSE", "ECE", "IT"], n),
+})
+df.loc[rng.random(n) < 0.05, "Solved count"] = np.nan
+
+by = ["Solved count", "Active_Secs", "Total submissions"]
+ascending = [False, True, True]
+keys = [df[c].to_numpy() for c in by]
+
+print(f"{'Case':<15} | {'Result'}")
+print("-" * 25)
+for top_n in [0, 1, 10, 50, n, n + 5, -3]:
+    expected = df.sort_values(by=by, ascending=ascending).head(top_n).index.to_numpy()
+    actual = rank_top_n(keys, ascending, top_n)
+    res = "PASS" if np.array_equal(actual, expected) else "FAIL"
+    print(f"{'top ' + str(top_n):<15} | {res}")
+
+grouped = rank_top_n_grouped(df["Branch"].to_numpy(), keys, ascending, 10)
+for branch in sorted(df["Branch"].unique()):
+    expected = df[df["Branch"] == branch].sort_values(by=by, ascending=ascending).head(10).index.to_numpy()
+    res = "PASS" if np.array_equal(grouped[branch], expected) else "FAIL"
+    print(f"{branch + ' top 10':<15} | {res}")